@@ -1,3 +1,4 @@
+from SignedNetZoo.signed_graph import SignedGraph
 from SignedNetZoo import datasets
 from SignedNetZoo import node_ranking
 from SignedNetZoo import link_prediction
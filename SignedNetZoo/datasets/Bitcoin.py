@@ -1,13 +1,12 @@
-from .utils import download_file, get_node_set_map
+from .dataset import SignedDataset
+from .utils import canonicalize_nodes
 
-import os
-import errno
-import random
+import numpy as np
 import pandas as pd
 import networkx as nx
 
 
-class Bitcoin(object):
+class Bitcoin(SignedDataset):
     """
     Class wrapping the Bitcoin OTC Trust Weighted Signed Network.
 
@@ -18,100 +17,128 @@ class Bitcoin(object):
                 created for train and test.`split` * number of edges are considered for
                 the training dataset, and (1 - `split`) * number of edges are considered
                 for the testing dataset. Default : None
+        seed : Seed for the permutation of the edges used to create the train and test sets.
+               Default : 0
+        folds : Specify a number of folds greater than 1. If `folds` is not None, then the
+                edges are divided into `folds` parts, of which the part indexed by `fold`
+                is the testing dataset and the rest is the training dataset. Cannot be used
+                along with `split`. Default : None
+        fold : Index of the fold used as the testing dataset. Default : 0
+        temporal : If True, the split is made in time order: the earliest `split` * number
+                   of edges are considered for the training dataset, and the rest for the
+                   testing dataset. Cannot be used along with `folds`. Default : False
+
+    The edges are stored in time order, along with their timestamps (seconds since epoch).
+    Use `edge_stream` to iterate over them in time order and `snapshots` to get the edges
+    in sliding time windows.
     """
 
     raw = "Bitcoin-OTC-Trust-Network/raw"
     processed = "Bitcoin-OTC-Trust-Network/processed"
     url = "https://snap.stanford.edu/data/soc-sign-bitcoinotc.csv.gz"
-    pickle_name = "soc-sign-bitcoinotc.gpickle"
-
-    def __init__(self, root='.', split=None):
-        self.root = root
-        self.raw_path = os.path.join(self.root, self.raw)
-        self.proc_path = os.path.join(self.root, self.processed)
-        self.split = split
-        if self.split is not None:
-            assert 0 < self.split < 1, "split argument out of range"
-
-        try:
-            os.makedirs(self.raw_path)
-            os.makedirs(self.proc_path)
-        except OSError as e:
-            if e.errno == errno.EEXIST:
-                pass
+    processed_name = "soc-sign-bitcoinotc"
+
+    def __init__(self, root='.', split=None, seed=0, folds=None, fold=0, temporal=False):
+        self.temporal = temporal
+        if self.temporal:
+            assert folds is None, "temporal and folds cannot be used together"
+        super(Bitcoin, self).__init__(root=root, split=split, seed=seed, folds=folds,
+                                      fold=fold)
+
+    def _read_raw(self):
+        # Import dataset as a Pandas DataFrame, check edge count.
+        df = pd.read_table(self.raw_file, compression='gzip', sep=',', header=None)
+
+        # Format of each row: SOURCE, TARGET, RATING, TIME.
+        # Sort the edges by TIME.
+        df = df.iloc[np.argsort(df[3].values, kind='mergesort')]
+
+        src, dst, node_ids = canonicalize_nodes(df[0].values, df[1].values)
+        return src, dst, df[2].values, node_ids, df[3].values
+
+    def split_mask(self):
+        if not self.temporal:
+            return super(Bitcoin, self).split_mask()
+
+        assert self.is_split, "dataset has no split"
+        num_edges = len(self._load_arrays()['src'])
+        mask = np.zeros(num_edges, dtype=bool)
+        mask[: int(self.split * num_edges)] = True
+        return mask
+
+    def _cache_key(self, part=''):
+        return super(Bitcoin, self)._cache_key(part) + (self.temporal,)
+
+    def edge_stream(self, batch_size=10000):
+        """
+        Generator over all the edges of the dataset in time order.
+
+        Arguments:
+            batch_size : number of edges per batch. Default : 10000
+
+        Yields:
+            dicts of arrays with keys 'src', 'dst', 'weight' and 'time', holding consecutive
+            batches of edges
+        """
+        arrays = self._load_arrays()
+        for begin in range(0, len(arrays['time']), batch_size):
+            yield {name: arrays[name][begin: begin + batch_size]
+                   for name in ['src', 'dst', 'weight', 'time']}
+
+    def snapshots(self, window, step=None, start=None, end=None, graph=False):
+        """
+        Generator over the edges of the dataset in sliding time windows [t, t + `window`),
+        for t = `start`, `start` + `step`, ... while t <= `end`. The windows are found by
+        binary search over the sorted timestamps, so each one is a slice of the edge arrays.
+
+        Arguments:
+            window : length of each window, in seconds
+            step : time between the starts of consecutive windows, in seconds.
+                   Default : `window` (non-overlapping windows)
+            start : start of the first window. Default : timestamp of the first edge
+            end : end of the time range. Default : timestamp of the last edge
+            graph : If True, yield a directed graph of the edges in each window instead of
+                    arrays. The same graph is updated in place from one window to the next,
+                    by removing the edges that left the window and adding those that
+                    entered it, so it should be copied if it is kept. Default : False
+
+        Yields:
+            (t, snapshot), where snapshot is a dict of arrays with keys 'src', 'dst',
+            'weight' and 'time' if `graph` is False, else a nx.DiGraph whose edges have
+            'weight' and 'time' attributes
+        """
+        arrays = self._load_arrays()
+        time = arrays['time']
+        if len(time) == 0:
+            return
+        step = window if step is None else step
+        start = time[0] if start is None else start
+        end = time[-1] if end is None else end
+        assert window > 0 and step > 0, "window and step must be positive"
+
+        if graph:
+            G = nx.DiGraph()
+            G.add_nodes_from(range(len(arrays['node_ids'])))
+        prev_begin = prev_end = 0
+        t = start
+        while t <= end:
+            begin, stop = np.searchsorted(time, [t, t + window], side='left')
+            if not graph:
+                yield t, {name: arrays[name][begin: stop]
+                          for name in ['src', 'dst', 'weight', 'time']}
             else:
-                raise
-
-        download_file(self.raw_path, self.url)
-        self._get_graph()
-
-    def _get_graph(self):
-        print("- Obtaining Networkx Graph...")
-
-        if self.split is None and os.path.isfile(os.path.join(self.proc_path, self.pickle_name)):
-            print("- Graph ready.")
-        elif self.split is not None and (os.path.isfile(os.path.join(self.proc_path,
-                                                        self.pickle_name + '.train_{}'
-                                                        .format(self.split))) or
-                                         os.path.isfile(os.path.join(self.proc_path,
-                                                        self.pickle_name + '.test_{}'.
-                                                        format(1 - self.split)))):
-            print("- Graphs ready.")
-        else:
-            print("- Pre-processing...")
-            # Import dataset as a Pandas DataFrame, check edge count.
-            df = pd.read_table(os.path.join(self.raw_path, os.path.basename(self.url)),
-                               compression='gzip', sep=',', header=None)
-
-            # Format of each row: SOURCE, TARGET, RATING, TIME.
-            # Removing the TIME column.
-            del df[3]
-
-            # Convert DataFrame to a list of tuples.
-            tuples = [tuple(x) for x in df.values]
-            tuples, node_map = get_node_set_map(tuples)
-
-            print("- Pre-processing done.")
-
-            if self.split is None:
-                print("- split is None, building one graph...")
-
-                self._get_graph_impl(tuples, node_map.values())
-
-                print("- Graph saved.")
-
-            else:
-                print("- split is {}, building two graphs...".format(self.split))
-
-                random.shuffle(tuples)
-                train_len = int(self.split * len(tuples))
-
-                self._get_graph_impl(tuples[: train_len], node_map.values(),
-                                     suffix='train_{}'.format(self.split))
-                self._get_graph_impl(tuples[train_len:], node_map.values(),
-                                     suffix='test_{}'.format(1 - self.split))
-
-                print("- Both Graphs saved.")
-
-    def _get_graph_impl(self, tuples, node_set, suffix=''):
-        # Build a directed graph.
-        G = nx.DiGraph()
-        G.add_nodes_from(node_set)
-        G.add_weighted_edges_from(tuples)
-        if suffix != '':
-            suffix = '.' + suffix
-
-        nx.write_gpickle(G, os.path.join(self.proc_path, self.pickle_name + suffix))
-
-    @property
-    def graph(self):
-        if self.split is None:
-            return nx.read_gpickle(os.path.join(self.proc_path, self.pickle_name))
-
-        else:
-            return (nx.read_gpickle(
-                        os.path.join(self.proc_path,
-                                     self.pickle_name + '.train_{}'.format(self.split))),
-                    nx.read_gpickle(
-                        os.path.join(self.proc_path,
-                                     self.pickle_name + '.test_{}'.format(1 - self.split))))
+                # Remove the edges which left the window, unless they have been replaced
+                # by a later edge between the same nodes.
+                for u, v, tm in zip(arrays['src'][prev_begin: min(begin, prev_end)].tolist(),
+                                    arrays['dst'][prev_begin: min(begin, prev_end)].tolist(),
+                                    time[prev_begin: min(begin, prev_end)].tolist()):
+                    if G.has_edge(u, v) and G[u][v]['time'] == tm:
+                        G.remove_edge(u, v)
+                new = slice(max(begin, prev_end), stop)
+                for u, v, w, tm in zip(arrays['src'][new].tolist(),
+                                       arrays['dst'][new].tolist(),
+                                       arrays['weight'][new].tolist(), time[new].tolist()):
+                    G.add_edge(u, v, weight=w, time=tm)
+                yield t, G
+            prev_begin, prev_end = begin, stop
+            t += step
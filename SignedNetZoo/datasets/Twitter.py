@@ -1,14 +1,77 @@
-from .utils import download_file, get_node_set_map, edges_are_same, get_equivalent_edge
+from .dataset import SignedDataset
+from .utils import canonicalize_nodes, open_archive_member, read_table_chunked
 
-import os
-import errno
-import random
-import zipfile
+import numpy as np
 import pandas as pd
-import networkx as nx
 
+# A mention is a whitespace-delimited word starting with '@' followed by at least one character.
+MENTION_PATTERN = r'(?<!\S)@(\S+)'
 
-class Twitter(object):
+
+def get_mention_edges(users, tweets, sentiments):
+    """
+    Function to build a signed adjacency list from tweets which mention exactly one user.
+    Each such tweet is an edge from its author to the mentioned user, positive if the tweet
+    is positive (sentiment 4) and negative if it is negative (sentiment 0); neutral tweets
+    are ignored. Multiple edges between the same pair of users are merged into one with the
+    sign of their sum, and dropped if the sum is zero.
+
+    Args:
+        users : Series of tweet authors
+        tweets : Series of tweet texts
+        sentiments : Series of tweet sentiments (0 = negative, 2 = neutral, 4 = positive)
+
+    Returns:
+        src : array of authors
+        dst : array of mentioned users
+        sign : array of signs
+    """
+    return merge_mention_edges(*_single_mentions(users, tweets, sentiments))
+
+
+def _single_mentions(users, tweets, sentiments):
+    # One edge per biased tweet with exactly one mention, before merging.
+    biased = (sentiments != 2).values
+    users, tweets, sentiments = users[biased], tweets[biased], sentiments[biased]
+
+    # Keep tweets with exactly one mention.
+    mentions = tweets.str.extractall(MENTION_PATTERN)[0].groupby(level=0)
+    counts = mentions.size()
+    single = counts.index[counts.values == 1]
+    targets = mentions.first().loc[single]
+
+    src = users.loc[single].values
+    dst = targets.values
+    sign = np.where(sentiments.loc[single].values == 4, 1, -1).astype(np.int8)
+    return src, dst, sign
+
+
+def merge_mention_edges(src, dst, sign):
+    """
+    Function to merge the edges between each pair of users into one with the sign of their
+    sum, dropping the pairs whose sum is zero (see `get_mention_edges`).
+
+    Args:
+        src : array of authors
+        dst : array of mentioned users
+        sign : array of signs
+
+    Returns:
+        src : array of authors
+        dst : array of mentioned users
+        sign : array of signs
+    """
+    # Sum the signs of the edges between each pair of users, keyed on factorized user ids.
+    codes, names = pd.factorize(np.concatenate([src, dst]))
+    num_users = len(names)
+    keys = codes[:len(src)].astype(np.int64) * num_users + codes[len(src):]
+    sums = pd.Series(sign, dtype=np.int64).groupby(keys).sum()
+    sums = sums[sums.values != 0]
+    src_codes, dst_codes = np.divmod(sums.index.values, num_users)
+    return names[src_codes], names[dst_codes], np.sign(sums.values)
+
+
+class Twitter(SignedDataset):
     """
     Class wrapping the Sentiment140 - Twitter dataset.
 
@@ -19,189 +82,31 @@ class Twitter(object):
                 created for train and test.`split` * number of edges are considered for
                 the training dataset, and (1 - `split`) * number of edges are considered
                 for the testing dataset. Default : None
+        seed : Seed for the permutation of the edges used to create the train and test sets.
+               Default : 0
+        folds : Specify a number of folds greater than 1. If `folds` is not None, then the
+                edges are divided into `folds` parts, of which the part indexed by `fold`
+                is the testing dataset and the rest is the training dataset. Cannot be used
+                along with `split`. Default : None
+        fold : Index of the fold used as the testing dataset. Default : 0
     """
 
     raw = "Twitter-Sentiment140/raw"
     processed = "Twitter-Sentiment140/processed"
     url = "http://cs.stanford.edu/people/alecmgo/trainingandtestdata.zip"
-    pickle_name = "tweets-s140.gpickle"
-
-    def __init__(self, root='.', split=None):
-        self.root = root
-        self.raw_path = os.path.join(self.root, self.raw)
-        self.proc_path = os.path.join(self.root, self.processed)
-        self.split = split
-        if self.split is not None:
-            assert 0 < self.split < 1, "split argument out of range"
-
-        try:
-            os.makedirs(self.raw_path)
-            os.makedirs(self.proc_path)
-        except OSError as e:
-            if e.errno == errno.EEXIST:
-                pass
-            else:
-                raise
-
-        download_file(self.raw_path, self.url)
-        self._get_graph()
-
-    def _get_graph(self):
-        print("- Obtaining Networkx Graph...")
-
-        if self.split is None and os.path.isfile(os.path.join(self.proc_path, self.pickle_name)):
-            print("- Graph ready.")
-        elif self.split is not None and (os.path.isfile(os.path.join(self.proc_path,
-                                                        self.pickle_name + '.train_{}'
-                                                        .format(self.split))) or
-                                         os.path.isfile(os.path.join(self.proc_path,
-                                                        self.pickle_name + '.test_{}'.
-                                                        format(1 - self.split)))):
-            print("- Graphs ready.")
-        else:
-            print("- Pre-processing...")
-            # Import dataset as a Pandas DataFrame.
-            zip_ref = zipfile.ZipFile(os.path.join(self.raw_path, os.path.basename(self.url)))
-            zip_ref.extractall(self.raw_path)
-            zip_ref.close()
-            df = pd.read_table(os.path.join(self.raw_path,
-                                            'training.1600000.processed.noemoticon.csv'),
-                               delimiter=',', encoding='latin-1', header=None)
-
-            biased_dataframe = df.loc[df[0] != 2]
-
-            tweets = biased_dataframe[5].values
-            uni = []
-            multi = []
-            for tweet in tweets:
-                words = tweet.split()
-                uniflag = False
-                multiflag = False
-                for word in words:
-                    if word[0] == '@' and len(word) > 1 and not uniflag:
-                        uniflag = True
-                    elif word[0] == '@' and len(word) > 1 and uniflag:
-                        multiflag = True
-                if multiflag:
-                    multi.append(tweet)
-                elif uniflag:
-                    uni.append(tweet)
-
-            src_list = biased_dataframe[4].values
-            tweet_list = biased_dataframe[5].values
-            sentiment_list = biased_dataframe[0].values
-            uni_list = []
-            multi_list = []
-
-            for index, tweet in enumerate(tweet_list):
-                target = []
-                words = tweet.split()
-                uniflag = False
-                target = ''
-                targets = []
-                for word in words:
-                    if word[0] == '@' and len(word) > 1 and not uniflag:
-                        target = word[1:]
-                        uniflag = True
-                    elif word[0] == '@' and len(word) > 1 and uniflag:
-                        targets.append(word[1:])
-                if len(targets) != 0:
-                    targets.append(target)
-                    multi_list.append([src_list[index], targets, sentiment_list[index]])
-                elif uniflag:
-                    uni_list.append([src_list[index], target, sentiment_list[index]])
-
-            src_users = [x[0] for x in uni_list]
-            tgt_users = [x[1] for x in uni_list]
-            src_users_set = set(src_users)
-            tgt_users_set = set(tgt_users)
-
-            user_cluster = src_users_set.union(tgt_users_set)
-            user_list = list(user_cluster)
-            hashmap = {user: index for index, user in enumerate(user_list)}
-
-            init_tuples = []
-            for row in uni_list:
-                if row[2] == 0:
-                    v = -1
-                elif row[2] == 4:
-                    v = 1
-                s, t = hashmap[row[0]], hashmap[row[1]]
-                init_tuples.append((s, t, v))
-
-            init_tuples.sort(key=lambda x: x[0]*1000000 + x[1])
-            tuples = []
-            prev_edge = init_tuples[0]
-            average_flag = False
-            average_set = []
-            for i in range(1, len(init_tuples)):
-                curr_edge = init_tuples[i]
-                if not edges_are_same(curr_edge, prev_edge) and not average_flag:
-                    tuples.append(prev_edge)
-                elif edges_are_same(curr_edge, prev_edge) and not average_flag:
-                    average_set.append(prev_edge)
-                    average_flag = True
-                elif edges_are_same(curr_edge, prev_edge) and average_flag:
-                    average_set.append(prev_edge)
-                elif not edges_are_same(curr_edge, prev_edge) and average_flag:
-                    average_set.append(prev_edge)
-                    equivalent_edge, valid = get_equivalent_edge(average_set)
-                    average_flag = False
-                    average_set = []
-                    if valid:
-                        tuples.append(equivalent_edge)
-                prev_edge = curr_edge
-            if average_flag:
-                average_set.append(prev_edge)
-                equivalent_edge, valid = get_equivalent_edge(average_set)
-                if valid:
-                    tuples.append(equivalent_edge)
-            else:
-                tuples.append(prev_edge)
-
-            print("- Pre-processing done.")
-
-            tuples, node_map = get_node_set_map(tuples)
-
-            if self.split is None:
-                print("- split is None, building one graph...")
-
-                self._get_graph_impl(tuples, node_map.values())
-
-                print("- Graph saved.")
-
-            else:
-                print("- split is {}, building two graphs...".format(self.split))
-
-                random.shuffle(tuples)
-                train_len = int(self.split * len(tuples))
-
-                self._get_graph_impl(tuples[: train_len], node_map.values(),
-                                     suffix='train_{}'.format(self.split))
-                self._get_graph_impl(tuples[train_len:], node_map.values(),
-                                     suffix='test_{}'.format(1 - self.split))
-
-                print("- Both Graphs saved.")
-
-    def _get_graph_impl(self, tuples, node_set, suffix=''):
-        # Build a directed graph.
-        G = nx.DiGraph()
-        G.add_nodes_from(node_set)
-        G.add_weighted_edges_from(tuples)
-        if suffix != '':
-            suffix = '.' + suffix
-
-        nx.write_gpickle(G, os.path.join(self.proc_path, self.pickle_name + suffix))
-
-    @property
-    def graph(self):
-        if self.split is None:
-            return nx.read_gpickle(os.path.join(self.proc_path, self.pickle_name))
-
-        else:
-            return (nx.read_gpickle(
-                        os.path.join(self.proc_path,
-                                     self.pickle_name + '.train_{}'.format(self.split))),
-                    nx.read_gpickle(
-                        os.path.join(self.proc_path,
-                                     self.pickle_name + '.test_{}'.format(1 - self.split))))
+    processed_name = "tweets-s140"
+
+    def _read_raw(self):
+        # Format of each row: SENTIMENT, ID, DATE, QUERY, USER, TWEET.
+        def convert(chunk):
+            return _single_mentions(chunk[4], chunk[5], chunk[0])
+
+        # Keep only the mention edges of each chunk of tweets, streamed from the archive.
+        with open_archive_member(self.raw_file,
+                                 'training.1600000.processed.noemoticon.csv') as f:
+            edges = read_table_chunked(f, convert, delimiter=',', encoding='latin-1',
+                                       header=None, usecols=[0, 4, 5])
+
+        src, dst, sign = merge_mention_edges(*edges)
+        src, dst, node_ids = canonicalize_nodes(src, dst)
+        return src, dst, sign, node_ids
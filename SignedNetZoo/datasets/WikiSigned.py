@@ -1,14 +1,10 @@
-from subprocess import call
-from .utils import download_file, get_node_set_map
+from .dataset import SignedDataset
+from .utils import canonicalize_nodes, open_archive_member, read_table_chunked
 
-import os
-import errno
-import random
-import pandas as pd
-import networkx as nx
+import numpy as np
 
 
-class WikiSigned(object):
+class WikiSigned(SignedDataset):
     """
     Class wrapping the WikiSigned social network dataset.
 
@@ -19,105 +15,30 @@ class WikiSigned(object):
                 created for train and test.`split` * number of edges are considered for
                 the training dataset, and (1 - `split`) * number of edges are considered
                 for the testing dataset. Default : None
+        seed : Seed for the permutation of the edges used to create the train and test sets.
+               Default : 0
+        folds : Specify a number of folds greater than 1. If `folds` is not None, then the
+                edges are divided into `folds` parts, of which the part indexed by `fold`
+                is the testing dataset and the rest is the training dataset. Cannot be used
+                along with `split`. Default : None
+        fold : Index of the fold used as the testing dataset. Default : 0
     """
 
     raw = "WikiSigned-Social-Network/raw"
     processed = "WikiSigned-Social-Network/processed"
     url = "http://konect.cc/files/download.tsv.wikisigned-k2.tar.bz2"
-    pickle_name = "wiki-signed.gpickle"
+    processed_name = "wiki-signed"
 
-    def __init__(self, root='.', split=None):
-        self.root = root
-        self.raw_path = os.path.join(self.root, self.raw)
-        self.proc_path = os.path.join(self.root, self.processed)
-        self.split = split
-        if self.split is not None:
-            assert 0 < self.split < 1, "split argument out of range"
+    def _read_raw(self):
+        # Format of each row: SOURCE<space>TARGET, SIGN.
+        def convert(chunk):
+            pairs = chunk[0].str.split(expand=True).astype(int)
+            return pairs[0].values, pairs[1].values, chunk[1].values.astype(np.int8)
 
-        try:
-            os.makedirs(self.raw_path)
-            os.makedirs(self.proc_path)
-        except OSError as e:
-            if e.errno == errno.EEXIST:
-                pass
-            else:
-                raise
+        # Read the edges in chunks, streamed from the archive.
+        with open_archive_member(self.raw_file, 'wikisigned-k2/out.wikisigned-k2') as f:
+            src, dst, sign = read_table_chunked(f, convert, sep='\t', index_col=False,
+                                                header=None, usecols=[0, 1], skiprows=1)
 
-        download_file(self.raw_path, self.url)
-        self._get_graph()
-
-    def _get_graph(self):
-        print("- Obtaining Networkx Graph...")
-
-        if self.split is None and os.path.isfile(os.path.join(self.proc_path, self.pickle_name)):
-            print("- Graph ready.")
-        elif self.split is not None and (os.path.isfile(os.path.join(self.proc_path,
-                                                        self.pickle_name + '.train_{}'
-                                                        .format(self.split))) or
-                                         os.path.isfile(os.path.join(self.proc_path,
-                                                        self.pickle_name + '.test_{}'.
-                                                        format(1 - self.split)))):
-            print("- Graphs ready.")
-        else:
-            print("- Pre-processing...")
-            # Import dataset as a Pandas DataFrame, check edge count.
-            call(['tar', 'xjf', os.path.join(self.raw_path, os.path.basename(self.url)),
-                  '-C', self.raw_path])
-            df = pd.read_table(os.path.join(self.raw_path, 'wikisigned-k2/out.wikisigned-k2'),
-                               sep='\t', index_col=False, header=None, usecols=[0, 1],
-                               skiprows=1)
-
-            # Format of each row: SOURCE<space>TARGET, SIGN.
-            # Convert DataFrame to a list of tuples.
-            data = df.values
-            tuples = []
-            for edge in data:
-                src, tgt = map(int, edge[0].split())
-                val = edge[1]
-                tuples.append((src, tgt, val))
-            tuples, node_map = get_node_set_map(tuples)
-
-            print("- Pre-processing done.")
-
-            if self.split is None:
-                print("- split is None, building one graph...")
-
-                self._get_graph_impl(tuples, node_map.values())
-
-                print("- Graph saved.")
-
-            else:
-                print("- split is {}, building two graphs...".format(self.split))
-
-                random.shuffle(tuples)
-                train_len = int(self.split * len(tuples))
-
-                self._get_graph_impl(tuples[: train_len], node_map.values(),
-                                     suffix='train_{}'.format(self.split))
-                self._get_graph_impl(tuples[train_len:], node_map.values(),
-                                     suffix='test_{}'.format(1 - self.split))
-
-                print("- Both Graphs saved.")
-
-    def _get_graph_impl(self, tuples, node_set, suffix=''):
-        # Build a directed graph.
-        G = nx.DiGraph()
-        G.add_nodes_from(node_set)
-        G.add_weighted_edges_from(tuples)
-        if suffix != '':
-            suffix = '.' + suffix
-
-        nx.write_gpickle(G, os.path.join(self.proc_path, self.pickle_name + suffix))
-
-    @property
-    def graph(self):
-        if self.split is None:
-            return nx.read_gpickle(os.path.join(self.proc_path, self.pickle_name))
-
-        else:
-            return (nx.read_gpickle(
-                        os.path.join(self.proc_path,
-                                     self.pickle_name + '.train_{}'.format(self.split))),
-                    nx.read_gpickle(
-                        os.path.join(self.proc_path,
-                                     self.pickle_name + '.test_{}'.format(1 - self.split))))
+        src, dst, node_ids = canonicalize_nodes(src, dst)
+        return src, dst, sign, node_ids
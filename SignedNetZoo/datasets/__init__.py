@@ -4,4 +4,6 @@ from .SlashdotZoo import SlashdotZoo
 from .Wikipedia import Wikipedia
 from .WikiSigned import WikiSigned
 from .Twitter import Twitter
+from .dataset import (SignedDataset, set_graph_cache_size, clear_graph_cache, download_datasets,
+                      prepare_datasets)
 from . import utils
@@ -0,0 +1,25 @@
+"""
+Download and pre-process datasets in parallel, and print the time spent in each stage:
+
+    python -m SignedNetZoo.datasets --datasets Bitcoin Epinions --dataroot ./data
+"""
+from argparse import ArgumentParser
+from SignedNetZoo.datasets import prepare_datasets
+
+DATASETS = ['Bitcoin', 'Epinions', 'SlashdotZoo', 'Twitter', 'WikiSigned', 'Wikipedia']
+STAGES = ['lock', 'download', 'preprocess', 'total']
+
+parser = ArgumentParser(description='Download and pre-process datasets in parallel')
+parser.add_argument('--datasets', type=str, default=DATASETS, nargs='+', choices=DATASETS,
+                    help='Names of the datasets to prepare. Default: all of them')
+parser.add_argument('--dataroot', type=str, default='.', help='Location of the datasets')
+parser.add_argument('--processes', type=int, default=None,
+                    help='Number of worker processes. Default: number of CPUs')
+args = parser.parse_args()
+
+timings = prepare_datasets(args.datasets, root=args.dataroot, processes=args.processes)
+
+print("{:<12}".format('dataset') + ''.join("{:>12}".format(stage) for stage in STAGES))
+for name in args.datasets:
+    print("{:<12}".format(name) +
+          ''.join("{:>11.2f}s".format(timings[name].get(stage, 0.)) for stage in STAGES))
@@ -0,0 +1,306 @@
+from .utils import (download_file, download_files, file_lock, save_edge_arrays, load_edge_arrays,
+                    build_graph)
+
+from ..signed_graph import SignedGraph
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+import os
+import time
+import errno
+import numpy as np
+
+# Graphs built by the `graph` property of any dataset, from least to most recently used.
+_graph_cache = OrderedDict()
+_graph_cache_size = 4
+
+
+def set_graph_cache_size(size):
+    """
+    Function to set the maximum number of graphs kept in memory by the datasets. When the
+    cache is full, the least recently used graph is dropped.
+
+    Args:
+        size : maximum number of cached graphs. 0 disables caching.
+    """
+    global _graph_cache_size
+    assert size >= 0, "size argument out of range"
+    _graph_cache_size = size
+    while len(_graph_cache) > size:
+        _graph_cache.popitem(last=False)
+
+
+def clear_graph_cache():
+    """
+    Function to drop all graphs cached by the datasets.
+    """
+    _graph_cache.clear()
+
+
+def _makedirs(path):
+    try:
+        os.makedirs(path)
+    except OSError as e:
+        if e.errno == errno.EEXIST:
+            pass
+        else:
+            raise
+
+
+def download_datasets(datasets, root='.', max_workers=4):
+    """
+    Function to download the raw files of several datasets concurrently, without processing
+    them. Instantiating the datasets afterwards does not download them again.
+
+    Args:
+        datasets : list of dataset classes, such as `[Epinions, SlashdotZoo]`
+        root : Root folder to save the raw datasets. Default: current directory ('.')
+        max_workers : maximum number of concurrent downloads. Default: 4
+    """
+    downloads = []
+    for dataset in datasets:
+        raw_path = os.path.join(root, dataset.raw)
+        _makedirs(raw_path)
+        downloads.append((raw_path, dataset.url, dataset.sha256))
+    download_files(downloads, max_workers=max_workers)
+
+
+def _prepare_dataset(name, root):
+    from SignedNetZoo import datasets
+
+    start = time.time()
+    dataset = getattr(datasets, name)(root=root)
+    timings = dict(dataset.timings)
+    timings['total'] = time.time() - start
+    return timings
+
+
+def prepare_datasets(names, root='.', processes=None):
+    """
+    Function to download and pre-process several datasets in a pool of processes. Datasets
+    which are already processed are only checked. Processes sharing the same `root` wait
+    for each other through file locks instead of processing a dataset twice.
+
+    Args:
+        names : list of dataset names, such as ['Bitcoin', 'Epinions']
+        root : Root folder to save the raw and processed datasets.
+               Default: current directory ('.')
+        processes : number of worker processes. Default: None (number of CPUs)
+
+    Returns:
+        dict mapping each dataset name to a dict of seconds spent waiting for locks ('lock'),
+        downloading ('download'), pre-processing ('preprocess') and in total ('total')
+    """
+    with ProcessPoolExecutor(max_workers=processes) as executor:
+        futures = [executor.submit(_prepare_dataset, name, root) for name in names]
+        return {name: future.result() for name, future in zip(names, futures)}
+
+
+class SignedDataset(object):
+    """
+    Base class for the signed network datasets. Subclasses specify where the dataset lives
+    (`raw`, `processed`, `url`, `processed_name`) and implement `_read_raw`, which parses
+    the downloaded file into canonicalized edge arrays.
+
+    The processed graph is stored once as a directory of typed NumPy arrays (int32 source
+    and target indices, int8 weights and the original node names), which are memory-mapped
+    on access. Train and test sets are selected from these arrays with a seeded permutation,
+    so a new split never re-reads the raw dataset. Networkx graphs are only built when the
+    `graph` property is accessed, and are cached across instances (see
+    `set_graph_cache_size`) until the processed files change or `release` is called. Since
+    cached graphs are shared, they should not be modified.
+
+    Downloading and processing hold file locks, so several processes can instantiate the
+    same dataset in the same `root` concurrently. The time spent in each stage is recorded
+    in the `timings` dict.
+
+    Arguments:
+        root : Root folder to save the raw and processed datasets.
+               Default: current directory ('.')
+        split : Specify a number between 0 and 1. If `split` is not None, then two graphs are
+                created for train and test.`split` * number of edges are considered for
+                the training dataset, and (1 - `split`) * number of edges are considered
+                for the testing dataset. Default : None
+        seed : Seed for the permutation of the edges used to create the train and test sets.
+               Default : 0
+        folds : Specify a number of folds greater than 1. If `folds` is not None, then the
+                edges are divided into `folds` parts, of which the part indexed by `fold`
+                is the testing dataset and the rest is the training dataset. Cannot be used
+                along with `split`. Default : None
+        fold : Index of the fold used as the testing dataset. Default : 0
+    """
+
+    raw = None
+    processed = None
+    url = None
+    processed_name = None
+    # SHA-256 digest of the file at `url`, checked on download if not None. Without it,
+    # the compressed download is only checked to be complete (see `download_file`).
+    sha256 = None
+
+    def __init__(self, root='.', split=None, seed=0, folds=None, fold=0):
+        self.root = root
+        self.raw_path = os.path.join(self.root, self.raw)
+        self.proc_path = os.path.join(self.root, self.processed)
+        self.split = split
+        self.seed = seed
+        self.folds = folds
+        self.fold = fold
+        if self.split is not None:
+            assert 0 < self.split < 1, "split argument out of range"
+            assert self.folds is None, "split and folds cannot be used together"
+        if self.folds is not None:
+            assert self.folds > 1, "folds argument out of range"
+            assert 0 <= self.fold < self.folds, "fold argument out of range"
+
+        for path in [self.raw_path, self.proc_path]:
+            _makedirs(path)
+
+        self.timings = {}
+        start = time.time()
+        download_file(self.raw_path, self.url, self.sha256)
+        self.timings['download'] = time.time() - start
+        self._get_graph()
+
+    @property
+    def raw_file(self):
+        return os.path.join(self.raw_path, os.path.basename(self.url))
+
+    @property
+    def processed_file(self):
+        return os.path.join(self.proc_path, self.processed_name)
+
+    @property
+    def is_split(self):
+        return self.split is not None or self.folds is not None
+
+    def _read_raw(self):
+        """
+        Parse the raw dataset.
+
+        Returns:
+            src : array of source node indices
+            dst : array of target node indices
+            weight : array of edge weights
+            node_ids : array of node names, indexed by node index
+            time : optionally, array of edge timestamps
+        """
+        raise NotImplementedError
+
+    def _get_graph(self):
+        print("- Obtaining edge arrays...")
+
+        start = time.time()
+        with file_lock(self.processed_file + '.lock'):
+            self.timings['lock'] = time.time() - start
+            start = time.time()
+            if os.path.isdir(self.processed_file):
+                print("- Edge arrays ready.")
+            else:
+                print("- Pre-processing...")
+                arrays = self._read_raw()
+
+                print("- Pre-processing done.")
+
+                save_edge_arrays(self.processed_file, *arrays)
+
+                print("- Edge arrays saved.")
+            self.timings['preprocess'] = time.time() - start
+
+    def split_mask(self):
+        """
+        Boolean mask over the edges of the processed dataset, which is True for the edges in
+        the training dataset. The mask only depends on the number of edges, `seed`, and
+        `split` or `folds` and `fold`.
+        """
+        assert self.is_split, "dataset has no split"
+        num_edges = len(load_edge_arrays(self.processed_file)['src'])
+        order = np.random.RandomState(self.seed).permutation(num_edges)
+        mask = np.ones(num_edges, dtype=bool)
+        if self.split is not None:
+            mask[order[int(self.split * num_edges):]] = False
+        else:
+            mask[np.array_split(order, self.folds)[self.fold]] = False
+        return mask
+
+    def _load_arrays(self, part=''):
+        arrays = load_edge_arrays(self.processed_file)
+        if part == '':
+            return arrays
+
+        mask = self.split_mask()
+        if part == 'test':
+            mask = ~mask
+        arrays.update({name: arrays[name][mask] for name in arrays if name != 'node_ids'})
+        return arrays
+
+    def _cache_key(self, part=''):
+        return (type(self), os.path.abspath(self.root), self.split, self.seed, self.folds,
+                self.fold, part)
+
+    def _load_graph(self, part=''):
+        key = self._cache_key(part)
+        mtime = os.stat(self.processed_file).st_mtime
+        if key in _graph_cache:
+            cached_mtime, G = _graph_cache.pop(key)
+            if cached_mtime == mtime:
+                _graph_cache[key] = (mtime, G)
+                return G
+
+        arrays = self._load_arrays(part)
+        G = build_graph(arrays['src'], arrays['dst'], arrays['weight'], len(arrays['node_ids']))
+        if _graph_cache_size > 0:
+            _graph_cache[key] = (mtime, G)
+            while len(_graph_cache) > _graph_cache_size:
+                _graph_cache.popitem(last=False)
+        return G
+
+    def _parts(self):
+        return ['train', 'test'] if self.is_split else ['']
+
+    def release(self):
+        """
+        Drop the graphs of this dataset from the in-memory cache.
+        """
+        for part in self._parts():
+            _graph_cache.pop(self._cache_key(part), None)
+
+    @property
+    def edges(self):
+        """
+        Edge arrays of the processed dataset, as a dict with keys 'src', 'dst', 'weight',
+        'node_ids' and, for datasets with timestamps, 'time'. These are memory-mapped if the
+        dataset has no split, else a 2-tuple of such dicts for the train and test sets is
+        returned.
+        """
+        if not self.is_split:
+            return self._load_arrays()
+
+        else:
+            return tuple(self._load_arrays(part) for part in self._parts())
+
+    def _load_signed_graph(self, part=''):
+        arrays = self._load_arrays(part)
+        return SignedGraph.from_edges(arrays['src'], arrays['dst'], arrays['weight'],
+                                      node_ids=arrays['node_ids'])
+
+    @property
+    def signed_graph(self):
+        """
+        The processed dataset as a SignedGraph, which takes much less memory than the
+        Networkx graph returned by `graph`. If `split` is not None, a 2-tuple of graphs for
+        the train and test sets.
+        """
+        if not self.is_split:
+            return self._load_signed_graph()
+
+        else:
+            return tuple(self._load_signed_graph(part) for part in self._parts())
+
+    @property
+    def graph(self):
+        if not self.is_split:
+            return self._load_graph()
+
+        else:
+            return tuple(self._load_graph(part) for part in self._parts())
@@ -4,96 +4,314 @@ try:
     import urllib.request
 except ImportError:
     from six.moves import urllib
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+    import msvcrt
+from contextlib import contextmanager, closing
+from concurrent.futures import ThreadPoolExecutor
+
+import io
+import bz2
+import gzip
+import hashlib
 import os
+import shutil
+import tarfile
+import zipfile
+import numpy as np
+import pandas as pd
+import networkx as nx
 
+EDGE_ARRAYS = ('src', 'dst', 'weight', 'node_ids')
 
-def gen_bar_updater(pbar):
-    """
-    TQDM hook for progress bar during download
+
+@contextmanager
+def file_lock(path):
     """
-    def bar_update(count, block_size, total_size):
-        if pbar.total is None and total_size:
-            pbar.total = total_size
-        progress_bytes = count * block_size
-        pbar.update(progress_bytes - pbar.n)
+    Context manager holding an exclusive lock on the file at `path` (created if needed),
+    which blocks until other processes holding the lock release it.
 
-    return bar_update
+    Args:
+        path : path to the lock file
+    """
+    with open(path, 'a') as f:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        else:
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
 
 
-def download_file(path, link):
+def download_file(path, link, sha256=None, chunk_size=1 << 20):
     """
     Function to download a file from `link` and save to `path`.
 
+    The file is written to `<name>.part` and only renamed to `<name>` once it is complete,
+    so an existing `<name>` is never a truncated download. Concurrent downloads of the same
+    file wait for each other through a lock on `<name>.lock`. An interrupted download is
+    resumed with an HTTP Range request when the server supports it. The SHA-256 digest
+    of the file is computed while it is written, and checked against `sha256` if given.
+    Otherwise, gzip, bzip2 and zip files are read to the end before the rename, so a
+    download cut short by a server which sends no Content-Length is not accepted either;
+    it is resumed on the next attempt. A full-length file which fails this check is corrupt,
+    and is removed so that the next attempt downloads it again.
+
     Args:
         path : path to the directory to save the file at
         link : URL for download
+        sha256 : expected SHA-256 hex digest of the file. Default: None (not checked)
+        chunk_size : number of bytes to read at a time. Default: 1 MiB
     """
     local_path = os.path.join(path, os.path.basename(link))
-    if os.path.isfile(local_path):
-        print("- File already downloaded.")
+    with file_lock(local_path + '.lock'):
+        if os.path.isfile(local_path):
+            print("- File already downloaded.")
+            return
+        _download_file(local_path, link, sha256, chunk_size)
+
+
+def _download_file(local_path, link, sha256, chunk_size):
+    part_path = local_path + '.part'
+    digest = hashlib.sha256()
+    offset = 0
+    if os.path.isfile(part_path):
+        with open(part_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(chunk_size), b''):
+                digest.update(chunk)
+                offset += len(chunk)
+
+    request = urllib.request.Request(link)
+    if offset > 0:
+        request.add_header('Range', 'bytes={}-'.format(offset))
+    try:
+        response = urllib.request.urlopen(request)
+    except urllib.error.HTTPError as e:
+        # The partial download already has every byte of the file.
+        if e.code != 416:
+            raise
+        response = None
+
+    # Whether the server vouched for the length of the file, by a Content-Length or a 416.
+    known_length = True
+    if response is not None:
+        with closing(response):
+            if offset > 0 and response.getcode() != 206:
+                # The server does not support resuming; start over.
+                digest = hashlib.sha256()
+                offset = 0
+            total = response.headers.get('Content-Length')
+            total = offset + int(total) if total is not None else None
+            known_length = total is not None
+
+            with open(part_path, 'ab' if offset > 0 else 'wb') as f, \
+                    tqdm(total=total, initial=offset, unit='B', unit_scale=True) as pbar:
+                for chunk in iter(lambda: response.read(chunk_size), b''):
+                    f.write(chunk)
+                    digest.update(chunk)
+                    pbar.update(len(chunk))
+
+        if total is not None and os.path.getsize(part_path) != total:
+            raise IOError("Incomplete download of {}".format(link))
+
+    if sha256 is not None and digest.hexdigest() != sha256.lower():
+        os.remove(part_path)
+        raise IOError("Checksum mismatch for {}: expected {}, got {}"
+                      .format(link, sha256, digest.hexdigest()))
+    if sha256 is None and not _is_complete_archive(part_path, local_path, chunk_size):
+        if not known_length:
+            # The download may have been cut short; keep it, so the next attempt resumes it.
+            raise IOError("Incomplete download of {}".format(link))
+        # Every byte the server sends is there, so the file is corrupt; start over next time.
+        os.remove(part_path)
+        raise IOError("Corrupt archive downloaded from {}".format(link))
+    os.rename(part_path, local_path)
+
+
+def _is_complete_archive(path, name, chunk_size):
+    # Read a compressed file to the end; truncated gzip and bzip2 streams raise EOFError,
+    # and a truncated zip file has no central directory. Other files are not checked.
+    try:
+        if name.endswith('.gz') or name.endswith('.bz2'):
+            with (gzip.open if name.endswith('.gz') else bz2.open)(path, 'rb') as f:
+                for _ in iter(lambda: f.read(chunk_size), b''):
+                    pass
+        elif name.endswith('.zip'):
+            with zipfile.ZipFile(path) as archive:
+                return archive.testzip() is None
+    except (EOFError, IOError, zipfile.BadZipfile):
+        return False
+    return True
+
+
+def download_files(downloads, max_workers=4):
+    """
+    Function to download several files concurrently, with `download_file`.
+
+    Args:
+        downloads : list of (path, link) or (path, link, sha256) tuples
+        max_workers : maximum number of concurrent downloads. Default: 4
+    """
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = [executor.submit(download_file, *download) for download in downloads]
+        for future in futures:
+            future.result()
+
+
+class _UnseekableReader(io.RawIOBase):
+    # Readable wrapper for members of tar archives opened as a stream, which do not
+    # implement the full file object interface.
+    def __init__(self, f):
+        self._f = f
+
+    def readable(self):
+        return True
+
+    def readinto(self, b):
+        data = self._f.read(len(b))
+        b[:len(data)] = data
+        return len(data)
+
+
+@contextmanager
+def open_archive_member(path, member):
+    """
+    Function to open a single member of a zip or tar archive as a file object, without
+    extracting the archive to disk. Tar archives are read as a stream, in one sequential
+    pass over the compressed file.
+
+    Args:
+        path : path to the archive
+        member : name of the member to open
+    """
+    if zipfile.is_zipfile(path):
+        with zipfile.ZipFile(path) as archive:
+            with archive.open(member) as f:
+                yield f
         return
-    urllib.request.urlretrieve(link, local_path,
-                               reporthook=gen_bar_updater(tqdm(unit='B', unit_scale=True)))
+
+    with tarfile.open(path, 'r|*') as archive:
+        for info in archive:
+            if info.name == member:
+                yield io.BufferedReader(_UnseekableReader(archive.extractfile(info)))
+                return
+    raise KeyError("{} not found in {}".format(member, path))
 
 
-def get_node_set_map(tuple_list):
+def read_table_chunked(f, convert, chunksize=1000000, **kwargs):
     """
-    Function to get a mapping of random node names to values between 0
-    and number of nodes - 1, with a modified adjacency list.
+    Function to read a delimited file in chunks of rows with `pd.read_csv`. Each chunk is
+    converted to a tuple of arrays by `convert` as soon as it is read, and only these arrays
+    are kept, so the whole table is never held in memory at once.
 
     Args:
-        tuple_list : adjacency list with weights and arbitrary node names
+        f : file object or path to read
+        convert : function taking a chunk (DataFrame) and returning a tuple of arrays
+        chunksize : number of rows per chunk. Default: 1000000
+        kwargs : other arguments to `pd.read_csv`
 
     Returns:
-        tuples : canonicalized adjacency list
-        node_map : mapping from node name to index
+        tuple of the arrays of all the chunks, concatenated
     """
-    node_set = set()
-    for tpl in tuple_list:
-        node_set.update(tpl[:2])
-    node_map = {node_name: idx for idx, node_name in enumerate(node_set)}
-    tuples = [(node_map[src], node_map[dst], wgt) for src, dst, wgt in tuple_list]
-    return tuples, node_map
+    parts = [convert(chunk) for chunk in pd.read_csv(f, chunksize=chunksize, **kwargs)]
+    return tuple(np.concatenate(arrays) for arrays in zip(*parts))
 
 
-def edges_are_same(a, b):
+def save_edge_arrays(path, src, dst, weight, node_ids, time=None):
     """
-    Function to check if two tuple elements (src, tgt, val) correspond
-    to the same directed edge (src, tgt).
+    Function to save a canonicalized edge list as a directory of typed `.npy` files.
+    The directory is written under a temporary name and renamed once complete, so a
+    partially written edge list is never mistaken for a processed one.
 
     Args:
-        tuple_elements : a = (src, val, val) and b = (src, val, val)
+        path : directory to save the arrays at
+        src : source node indices
+        dst : target node indices
+        weight : edge weights (signs, or ratings for weighted networks)
+        node_ids : original node names, indexed by node index
+        time : timestamps of the edges, if any. Default: None
+    """
+    arrays = {'src': np.asarray(src, dtype=np.int32),
+              'dst': np.asarray(dst, dtype=np.int32),
+              'weight': np.asarray(weight, dtype=np.int8),
+              'node_ids': np.asarray(node_ids)}
+    if arrays['node_ids'].dtype == object:
+        arrays['node_ids'] = arrays['node_ids'].astype(str)
+    if time is not None:
+        arrays['time'] = np.asarray(time, dtype=np.float64)
+
+    tmp_path = path + '.tmp'
+    if os.path.isdir(tmp_path):
+        shutil.rmtree(tmp_path)
+    os.makedirs(tmp_path)
+    for name in arrays:
+        np.save(os.path.join(tmp_path, name + '.npy'), arrays[name])
+    os.rename(tmp_path, path)
+
+
+def load_edge_arrays(path, mmap_mode='r'):
+    """
+    Function to load an edge list saved by `save_edge_arrays`.
+
+    Args:
+        path : directory the arrays were saved at
+        mmap_mode : memory-map mode passed to `np.load`. Default: 'r'
 
     Returns:
-        True or False
+        dict with keys 'src', 'dst', 'weight' and 'node_ids', and 'time' if the edges
+        have timestamps
     """
-    if a[0:2] == b[0:2]:
-        return True
-    else:
-        return False
+    arrays = {name: np.load(os.path.join(path, name + '.npy'), mmap_mode=mmap_mode)
+              for name in EDGE_ARRAYS}
+    if os.path.isfile(os.path.join(path, 'time.npy')):
+        arrays['time'] = np.load(os.path.join(path, 'time.npy'), mmap_mode=mmap_mode)
+    return arrays
 
 
-def get_equivalent_edge(edges):
+def build_graph(src, dst, weight, num_nodes):
     """
-    Function to obtain an equivalent directional edge between two nodes
-    which have multiple edges in between. Also, assesses if edge is rendered neutral.
+    Function to build a directed Networkx graph from edge arrays.
 
     Args:
-        edges : List of tuple objects (src, val, val)
-                with same 'src' and 'tgt' values and varying 'val' values
+        src : source node indices
+        dst : target node indices
+        weight : edge weights
+        num_nodes : number of nodes, all of which are added to the graph
 
     Returns:
-        equivalent_edge : Tuple object which represents the equivalent edge between
-                          the given two nodes
-        valid : True or False, based on whether the edge is valid or rendered to
-                become neutral
-    """
-    mean = 0
-    for edge in edges:
-        mean += edge[2]
-    if mean == 0:
-        return (edges[0][0], edges[0][1], 0), False
-    elif mean > 0:
-        return (edges[0][0], edges[0][1], 1), True
-    else:
-        return (edges[0][0], edges[0][1], -1), True
+        nx.DiGraph with nodes 0, ..., `num_nodes` - 1 and a 'weight' on every edge
+    """
+    G = nx.DiGraph()
+    G.add_nodes_from(range(num_nodes))
+    G.add_weighted_edges_from(zip(np.asarray(src).tolist(), np.asarray(dst).tolist(),
+                                  np.asarray(weight).tolist()))
+    return G
+
+
+def canonicalize_nodes(src, dst):
+    """
+    Function to map arbitrary node names to values between 0 and number of nodes - 1.
+    Nodes are numbered in sorted order of their names, so the mapping does not depend
+    on the order of the edges or on the interpreter.
+
+    Args:
+        src : array of source node names
+        dst : array of target node names
+
+    Returns:
+        src : array of source node indices (int32)
+        dst : array of target node indices (int32)
+        node_ids : array of node names, such that node_ids[index] is the name of `index`
+    """
+    src, dst = np.asarray(src), np.asarray(dst)
+    node_ids, indices = np.unique(np.concatenate([src, dst]), return_inverse=True)
+    indices = indices.astype(np.int32).reshape(-1)
+    return indices[:len(src)], indices[len(src):], node_ids
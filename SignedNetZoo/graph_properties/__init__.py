@@ -1,6 +1,11 @@
-from .graph_defs import (get_adjacency_matrix, get_absolute_adjacency_matrix,
+from .graph_defs import (get_matrix_bundle, clear_matrix_bundle,
+                         get_adjacency_matrix, get_absolute_adjacency_matrix,
                          get_symmetric_adjacency_matrix, get_absolute_symmetric_adjacency_matrix,
-                         get_absolute_diagonal_degree_matrix, get_absolute_symmetric_diagonal_degree_matrix)
+                         get_absolute_diagonal_degree_matrix, get_absolute_symmetric_diagonal_degree_matrix,
+                         get_signed_laplacian, get_normalized_signed_laplacian,
+                         get_opposing_laplacian, get_laplacian_operator)
+from .triangles import triangle_counts, wedge_samples, triad_census
 from . import clustering_coeffs
-from .balance import is_balanced
-from . import utils
+from .balance import is_balanced, BalanceTracker, frustration_index
+from .spectral import algebraic_conflict, walk_balance
+from .summary import summarize
@@ -1,4 +1,15 @@
-from .utils import constrained_bfs
+import numpy as np
+import scipy.sparse as ssp
+
+from scipy.sparse.csgraph import connected_components
+
+from concurrent.futures import ProcessPoolExecutor
+
+from .graph_defs import get_matrix_bundle, _node_names
+from .spectral import _smallest_eigenpairs
+
+# Symmetric matrix of edge signs of the graph being searched, set in each worker process.
+_worker_signs = None
 
 
 # check if a graph is balanced
@@ -7,82 +18,62 @@ def is_balanced(graph_obj, meta_data=False):
     Function to check if a signed graph is balanced. The algorithm used here has been
     adopted from the paper "On the notion of balance of a signed graph" by Frank Harary
     and the boook "Networks, Crowds, and Markets: Reasoning About a Highly Connected World"
-    by David Easley and Jon Kleinberg.
+    by David Easley and Jon Kleinberg. The sets of nodes connected by positive edges are found
+    with `scipy.sparse.csgraph.connected_components`, and the negative edges are checked with
+    array operations, so no Python loop runs over the nodes or edges. Edges with positive
+    weights are positive and edges with negative weights are negative. Edge directions are
+    ignored, but in directed graphs both edges of a reciprocal pair are checked, so a pair
+    of opposite signs makes the graph unbalanced. The nodes of each of the `original_sets`
+    are listed in the order of the nodes of the graph.
 
     Args:
-        graph_obj : The signed graph to pass
+        graph_obj : The signed graph to pass (Networkx graph object or SignedGraph)
         meta_data : Option to get meta data regarding the nature of the balance in the graphs.
                     Default: False
 
     Returns:
         A two tuple: (bool, meta-data dict). The meta-data dict is None, if meta_data is False
     """
-    from networkx import Graph
-    from networkx.algorithms import bipartite
+    bundle = get_matrix_bundle(graph_obj)
+    nodes = _node_names(graph_obj)
+    n = len(nodes)
 
-    if graph_obj.is_directed():
-        undirected_graph_obj = graph_obj.to_undirected()
-    else:
-        undirected_graph_obj = graph_obj
-
-    nodes = undirected_graph_obj.nodes()
-
-    node_labels = {}
-    cur_label = 0
-    for node in nodes:
-        if node not in node_labels:
-            constrained_bfs(undirected_graph_obj, node_labels, cur_label, 1, node)
-            cur_label += 1
-
-    num_labels = cur_label
-
-    set_graph = Graph()
-    set_graph.add_nodes_from([x for x in range(num_labels)])
-
-    # check for mutual antagonism between sets and mutual friendship inside sets
-    edges = undirected_graph_obj.edges()
-    balanced = True
-    for edge in edges:
-        f = edge[0]
-        s = edge[1]
-        if undirected_graph_obj[f][s]['weight'] == 1:
-            if node_labels[f] != node_labels[s]:    # this shouldn't happen
-                balanced = False
-                break
-        if undirected_graph_obj[f][s]['weight'] == -1:
-            set_graph.add_edge(node_labels[f], node_labels[s])
-            if node_labels[f] == node_labels[s]:
-                balanced = False
-                break
+    # label the sets of nodes connected by positive edges, ignoring edge directions
+    edges = bundle.A.tocoo()
+    positive, negative = edges.data > 0, edges.data < 0
+    positive_graph = ssp.coo_matrix((np.ones(positive.sum(), dtype=np.int8),
+                                     (edges.row[positive], edges.col[positive])), shape=(n, n))
+    num_labels, labels = connected_components(positive_graph, directed=False)
+
+    # check for mutual antagonism between sets; positive edges are inside sets by construction
+    first, second = labels[edges.row[negative]], labels[edges.col[negative]]
+    balanced = not np.any(first == second)
 
     metas = None
     if meta_data and balanced:
-        # determine strength of balance (bipartite condition for sets antagonism)
-        strong = None
-        if bipartite.is_bipartite(set_graph):
-            strong = True
-        else:
-            strong = False
+        # determine strength of balance (bipartite condition for sets antagonism): the graph
+        # of sets is bipartite iff no set is connected to its copy in the doubled graph, which
+        # links each set to the copies of its antagonists
+        doubled_graph = ssp.coo_matrix((np.ones(2 * len(first), dtype=np.int8),
+                                        (np.concatenate([first, first + num_labels]),
+                                         np.concatenate([second + num_labels, second]))),
+                                       shape=(2 * num_labels, 2 * num_labels))
+        _, doubled_labels = connected_components(doubled_graph, directed=False)
+        strong = not np.any(doubled_labels[:num_labels] == doubled_labels[num_labels:])
 
         # sets
-        sets = [[] for i in range(num_labels)]
-        for node in node_labels:
-            sets[node_labels[node]].append(node)
+        order = np.argsort(labels, kind='mergesort')
+        bounds = np.cumsum(np.bincount(labels, minlength=num_labels))[:-1]
+        sets = [list(set_) for set_ in np.split(nodes[order], bounds)]
 
-        # possible split
+        # possible split: the first set of each group of antagonistic sets is colored 1,
+        # and sets without enemies are colored 0
         split = None
         if strong:
-            coloring = bipartite.color(set_graph)
-            X = set()
-            Y = set()
-            for set_ in coloring:
-                if coloring[set_] == 0:
-                    for node in sets[set_]:
-                        X.add(node)
-                else:
-                    for node in sets[set_]:
-                        Y.add(node)
-            split = {frozenset(X), frozenset(Y)}
+            has_enemies = np.zeros(num_labels, dtype=bool)
+            has_enemies[first] = has_enemies[second] = True
+            coloring = has_enemies & (doubled_labels[:num_labels] < doubled_labels[num_labels:])
+            split = {frozenset(nodes[~coloring[labels]]), frozenset(nodes[coloring[labels]])}
 
         metas = {}
         metas['num_original_sets'] = num_labels
@@ -92,3 +83,244 @@ def is_balanced(graph_obj, meta_data=False):
         metas['possible_split'] = split
 
     return (balanced, metas)
+
+
+class BalanceTracker(object):
+    """
+    Class to track the balance of a signed graph whose edges arrive one at a time, using a
+    union-find over the nodes in which each node also stores the parity of its side relative
+    to its parent: a positive edge joins two nodes on the same side and a negative edge two
+    nodes on opposite sides. The graph is balanced as long as no edge closes a cycle with an
+    odd number of negative edges, which is `is_balanced` returning a 'strong' balance. Adding
+    an edge takes nearly constant time, thanks to path compression and union by rank.
+
+    Nodes can be any hashable objects, and are indexed in the order they are first seen.
+    Edge directions are ignored, and edges with weight 0 are skipped.
+
+    Arguments:
+        nodes : Optional iterable of nodes to index first. Default: None
+    """
+
+    def __init__(self, nodes=None):
+        self._index = {}
+        self._nodes = []
+        self._parent = np.zeros(16, dtype=np.int64)
+        self._parity = np.zeros(16, dtype=np.int8)
+        self._rank = np.zeros(16, dtype=np.int8)
+        self._has_negative = np.zeros(16, dtype=bool)
+        self.num_edges = 0
+        # first edge which made the graph unbalanced, None if the graph is balanced
+        self.conflict = None
+        for node in nodes if nodes is not None else []:
+            self._node_index(node)
+
+    @property
+    def balanced(self):
+        return self.conflict is None
+
+    def number_of_nodes(self):
+        return len(self._nodes)
+
+    def _node_index(self, node):
+        index = self._index.get(node)
+        if index is None:
+            index = len(self._nodes)
+            if index == len(self._parent):
+                for name in ['_parent', '_parity', '_rank', '_has_negative']:
+                    array = getattr(self, name)
+                    setattr(self, name, np.concatenate([array, np.zeros_like(array)]))
+            self._parent[index] = index
+            self._index[node] = index
+            self._nodes.append(node)
+        return index
+
+    def _find(self, index):
+        # root of the set of `index` and the parity of `index` relative to it
+        parent, parity = self._parent, self._parity
+        root, root_parity = index, 0
+        while parent[root] != root:
+            root_parity ^= parity[root]
+            root = parent[root]
+
+        # path compression: point every node on the path to the root
+        cur_parity = root_parity
+        while parent[index] != root and index != root:
+            next_index, next_parity = parent[index], cur_parity ^ parity[index]
+            parent[index], parity[index] = root, cur_parity
+            index, cur_parity = next_index, next_parity
+        return root, root_parity
+
+    def add_edge(self, u, v, weight):
+        """
+        Add an edge to the graph.
+
+        Args:
+            u : first node of the edge
+            v : second node of the edge
+            weight : weight of the edge, whose sign is used
+
+        Returns:
+            bool : whether the graph is still balanced
+        """
+        if weight == 0:
+            return self.balanced
+        negative = 1 if weight < 0 else 0
+        self.num_edges += 1
+        root_u, parity_u = self._find(self._node_index(u))
+        root_v, parity_v = self._find(self._node_index(v))
+
+        if root_u == root_v:
+            if parity_u ^ parity_v != negative and self.conflict is None:
+                self.conflict = (u, v, weight)
+            self._has_negative[root_u] |= bool(negative)
+            return self.balanced
+
+        if self._rank[root_u] < self._rank[root_v]:
+            root_u, root_v = root_v, root_u
+        elif self._rank[root_u] == self._rank[root_v]:
+            self._rank[root_u] += 1
+        self._parent[root_v] = root_u
+        self._parity[root_v] = parity_u ^ parity_v ^ negative
+        self._has_negative[root_u] |= self._has_negative[root_v] or bool(negative)
+        return self.balanced
+
+    def add_edges(self, edges):
+        """
+        Add several edges to the graph.
+
+        Args:
+            edges : iterable of 3-tuples (u, v, weight)
+
+        Returns:
+            bool : whether the graph is still balanced
+        """
+        for u, v, weight in edges:
+            self.add_edge(u, v, weight)
+        return self.balanced
+
+    def possible_split(self):
+        """
+        Get the current two-coloring of the nodes, in the same form and with the same
+        coloring of the components as the `possible_split` of `is_balanced`, for a graph
+        with the same nodes in the same order.
+
+        Returns:
+            set of two frozensets of nodes, or None if the graph is not balanced
+        """
+        if not self.balanced:
+            return None
+
+        n = len(self._nodes)
+        roots, parities = np.zeros(n, dtype=np.int64), np.zeros(n, dtype=np.int8)
+        for index in range(n):
+            roots[index], parities[index] = self._find(index)
+
+        # the first node of each component with negative edges is colored 1, and the nodes
+        # of components without negative edges are colored 0
+        first = np.full(n, n, dtype=np.int64)
+        np.minimum.at(first, roots, np.arange(n))
+        coloring = self._has_negative[roots] & (parities == parities[first[roots]])
+        nodes = np.empty(n, dtype=object)
+        nodes[:] = self._nodes
+        return {frozenset(nodes[~coloring]), frozenset(nodes[coloring])}
+
+
+def _init_worker(sym_signs):
+    global _worker_signs
+    _worker_signs = sym_signs
+
+
+def _round_flips(spins, sym_signs, has_neighbours, rng):
+    # Mask of the nodes to flip together in one round of `_local_search`, or None if no flip
+    # reduces the frustration. Flipping node u reduces it by -spins[u] * (sym_signs spins)[u],
+    # and the improving nodes whose gain is the largest among their improving neighbours are
+    # flipped; since no two of them are adjacent, their gains add up.
+    gains = -spins * sym_signs.dot(spins)
+    improving = gains > 0
+    if not improving.any():
+        return None
+    priority = np.where(improving, gains + rng.uniform(0, 0.5, len(spins)), 0)
+    neighbour_max = np.zeros(len(spins))
+    neighbour_max[has_neighbours] = np.maximum.reduceat(priority[sym_signs.indices],
+                                                        sym_signs.indptr[:-1][has_neighbours])
+    return improving & (priority > neighbour_max)
+
+
+def _local_search(spins, seed, sym_signs=None):
+    # Flip nodes until no single flip reduces the frustration.
+    sym_signs = _worker_signs if sym_signs is None else sym_signs
+    rng = np.random.RandomState(seed)
+    spins = spins.copy()
+    has_neighbours = np.diff(sym_signs.indptr) > 0
+    while True:
+        flips = _round_flips(spins, sym_signs, has_neighbours, rng)
+        if flips is None:
+            return spins
+        spins[flips] *= -1
+
+
+def frustration_index(graph_obj, restarts=10, noise=0.2, processes=1, seed=None):
+    """
+    Function to approximate the frustration index of a signed graph, which is the minimum
+    number of edges whose removal makes the graph balanced: the number of edges which are
+    negative inside or positive across the best split of the nodes into two sets. Computing
+    it exactly is NP-hard, so a local search is run from the split given by the signs of the
+    eigenvector of the smallest eigenvalue of the signed Laplacian (see
+    `algebraic_conflict`), and from `restarts` copies of it with a random fraction `noise` of
+    the nodes moved, and the best split found is returned. The restarts can be run by a pool
+    of processes. Edge directions are ignored, but in directed graphs each edge is counted
+    once per direction.
+
+    Args:
+        graph_obj : The signed graph to pass (Networkx graph object or SignedGraph)
+        restarts : number of random restarts. Default: 10
+        noise : fraction of the nodes moved at each restart. Default: 0.2
+        processes : number of worker processes, None for the number of CPUs. Default: 1
+        seed : seed of the random number generators. Default: None
+
+    Returns:
+        A three tuple: (number of frustrated edges, split, frustrated edges), where the split
+        is a set of two frozensets of nodes as the `possible_split` of `is_balanced`, and the
+        frustrated edges are a list of 2-tuples of nodes
+    """
+    bundle = get_matrix_bundle(graph_obj)
+    nodes = _node_names(graph_obj)
+    n = len(nodes)
+    edges = bundle.A.tocoo()
+    nonzero = edges.data != 0
+    if not graph_obj.is_directed():
+        nonzero &= edges.row <= edges.col
+    row, col, signs = edges.row[nonzero], edges.col[nonzero], np.sign(edges.data[nonzero])
+    loops = row == col
+    sym_signs = ssp.coo_matrix((np.concatenate([signs[~loops], signs[~loops]]),
+                                (np.concatenate([row[~loops], col[~loops]]),
+                                 np.concatenate([col[~loops], row[~loops]]))),
+                               shape=(n, n)).tocsr().astype(np.int64)
+
+    spins = np.ones(n, dtype=np.int64)
+    if sym_signs.nnz > 0:
+        _, vectors = _smallest_eigenpairs(bundle, 1, False, None, 500, seed, True)
+        spins[vectors[:, 0] < 0] = -1
+
+    rng = np.random.RandomState(seed)
+    starts = [spins]
+    for _ in range(restarts):
+        start = spins.copy()
+        start[rng.uniform(size=n) < noise] *= -1
+        starts.append(start)
+    seeds = rng.randint(0, 2 ** 31 - 1, len(starts))
+
+    if processes == 1:
+        results = [_local_search(start, start_seed, sym_signs)
+                   for start, start_seed in zip(starts, seeds)]
+    else:
+        with ProcessPoolExecutor(max_workers=processes, initializer=_init_worker,
+                                 initargs=(sym_signs,)) as executor:
+            results = list(executor.map(_local_search, starts, seeds))
+
+    frustrated = [spins[row] * spins[col] * signs < 0 for spins in results]
+    best = int(np.argmin([mask.sum() for mask in frustrated]))
+    side = results[best] > 0
+    split = {frozenset(nodes[side]), frozenset(nodes[~side])}
+    mask = frustrated[best]
+    return (int(mask.sum()), split, list(zip(nodes[row[mask]], nodes[col[mask]])))
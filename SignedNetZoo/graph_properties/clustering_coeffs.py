@@ -1,50 +1,210 @@
-from . import graph_defs as gd
+import numpy as np
 
+from scipy.stats import norm
 
-def clustering_coeff(graph_obj):
+from .triangles import triangle_counts, wedge_samples
+
+
+def _ratio(num, den):
+    # element-wise num / den, with 0 where den is 0
+    num, den = np.asarray(num, dtype=np.float64), np.asarray(den, dtype=np.float64)
+    out = np.zeros(num.shape)
+    np.divide(num, den, out=out, where=den != 0)
+    return out
+
+
+def clustering_coeff(graph_obj, block_wedges=None, processes=1):
     """
     Function to get clustering coefficient for a given graph.
 
     Args:
-        graph_obj : NetworkX graph object
+        graph_obj : NetworkX graph object or SignedGraph
+        block_wedges : maximum number of wedges per block of rows (see `triangle_counts`).
+                       Default: None
+        processes : number of worker processes, None for the number of CPUs. Default: 1
 
     Returns:
         float representing clustering coefficient of the graph.
     """
-    abs_adj_mat = gd.get_absolute_adjacency_matrix(graph_obj)
-    sq_abs_adj_mat = abs_adj_mat.dot(abs_adj_mat)
-    return abs_adj_mat.multiply(sq_abs_adj_mat).sum() / sq_abs_adj_mat.sum()
+    counts = triangle_counts(graph_obj, block_wedges, processes)
+    return counts['triangles'] / counts['wedges']
 
 
-def sign_clustering_coeff(graph_obj):
+def sign_clustering_coeff(graph_obj, block_wedges=None, processes=1):
     """
     Function to get signed clustering coefficient for a given graph.
 
     Args:
-        graph_obj : NetworkX graph object
+        graph_obj : NetworkX graph object or SignedGraph
+        block_wedges : maximum number of wedges per block of rows (see `triangle_counts`).
+                       Default: None
+        processes : number of worker processes, None for the number of CPUs. Default: 1
 
     Returns:
         float representing signed clustering coefficient of the graph.
     """
-    adj_mat, _ = gd.get_adjacency_matrix(graph_obj)
-    sq_adj_mat = adj_mat.dot(adj_mat)
-    abs_adj_mat = abs(adj_mat)
-    sq_abs_adj_mat = abs_adj_mat.dot(abs_adj_mat)
-    return adj_mat.multiply(sq_adj_mat).sum() / sq_abs_adj_mat.sum()
+    counts = triangle_counts(graph_obj, block_wedges, processes)
+    return counts['signed_triangles'] / counts['wedges']
 
 
-def relative_sign_clustering_coeff(graph_obj):
+def relative_sign_clustering_coeff(graph_obj, block_wedges=None, processes=1):
     """
     Function to get relative signed clustering coefficient for a given graph.
     This is defined as the ratio between the signed clustering coefficient and
     the clustering coefficient.
 
     Args:
-        graph_obj : NetworkX graph object
+        graph_obj : NetworkX graph object or SignedGraph
+        block_wedges : maximum number of wedges per block of rows (see `triangle_counts`).
+                       Default: None
+        processes : number of worker processes, None for the number of CPUs. Default: 1
 
     Returns:
         float representing relative signed clustering coefficient of the graph.
     """
-    C = clustering_coeff(graph_obj)
-    C_s = sign_clustering_coeff(graph_obj)
-    return C_s / C
+    counts = triangle_counts(graph_obj, block_wedges, processes)
+    return counts['signed_triangles'] / counts['triangles']
+
+
+def local_clustering_coeff(graph_obj, block_wedges=None, processes=1):
+    """
+    Function to get the clustering coefficient of each node of a given graph, which is the
+    fraction of the wedges i -> k -> j starting at node i that are closed by an edge i -> j.
+
+    Args:
+        graph_obj : NetworkX graph object or SignedGraph
+        block_wedges : maximum number of wedges per block of rows (see `triangle_counts`).
+                       Default: None
+        processes : number of worker processes, None for the number of CPUs. Default: 1
+
+    Returns:
+        array of the clustering coefficients indexed by node, with 0 for nodes without
+        wedges.
+    """
+    counts = triangle_counts(graph_obj, block_wedges, processes, local=True)
+    return _ratio(counts['triangles'], counts['wedges'])
+
+
+def local_sign_clustering_coeff(graph_obj, block_wedges=None, processes=1):
+    """
+    Function to get the signed clustering coefficient of each node of a given graph.
+
+    Args:
+        graph_obj : NetworkX graph object or SignedGraph
+        block_wedges : maximum number of wedges per block of rows (see `triangle_counts`).
+                       Default: None
+        processes : number of worker processes, None for the number of CPUs. Default: 1
+
+    Returns:
+        array of the signed clustering coefficients indexed by node, with 0 for nodes
+        without wedges.
+    """
+    counts = triangle_counts(graph_obj, block_wedges, processes, local=True)
+    return _ratio(counts['signed_triangles'], counts['wedges'])
+
+
+def local_relative_sign_clustering_coeff(graph_obj, block_wedges=None, processes=1):
+    """
+    Function to get the relative signed clustering coefficient of each node of a given
+    graph.
+
+    Args:
+        graph_obj : NetworkX graph object or SignedGraph
+        block_wedges : maximum number of wedges per block of rows (see `triangle_counts`).
+                       Default: None
+        processes : number of worker processes, None for the number of CPUs. Default: 1
+
+    Returns:
+        array of the relative signed clustering coefficients indexed by node, with 0 for
+        nodes without triangles.
+    """
+    counts = triangle_counts(graph_obj, block_wedges, processes, local=True)
+    return _ratio(counts['signed_triangles'], counts['triangles'])
+
+
+def local_clustering_coeffs(graph_obj, block_wedges=None, processes=1):
+    """
+    Function to get the three local clustering coefficients of a given graph in one pass
+    over its triangles.
+
+    Args:
+        graph_obj : NetworkX graph object or SignedGraph
+        block_wedges : maximum number of wedges per block of rows (see `triangle_counts`).
+                       Default: None
+        processes : number of worker processes, None for the number of CPUs. Default: 1
+
+    Returns:
+        3-tuple of arrays indexed by node : (clustering coefficients, signed clustering
+        coefficients, relative signed clustering coefficients)
+    """
+    counts = triangle_counts(graph_obj, block_wedges, processes, local=True)
+    return (_ratio(counts['triangles'], counts['wedges']),
+            _ratio(counts['signed_triangles'], counts['wedges']),
+            _ratio(counts['signed_triangles'], counts['triangles']))
+
+
+def _approx_coeff(graph_obj, signed, samples, half_width, confidence, batch_size,
+                  max_samples, seed):
+    # mean and standard error of the (signed) closing weights of sampled wedges
+    assert (samples is None) != (half_width is None), \
+        "exactly one of samples and half_width should be given"
+    z = norm.ppf(0.5 + confidence / 2.0)
+    total, total_sq, drawn = 0.0, 0.0, 0
+    limit = samples if samples is not None else max_samples
+    for batch in wedge_samples(graph_obj, batch_size, seed):
+        batch = batch[1 if signed else 0][:limit - drawn]
+        total, total_sq, drawn = total + batch.sum(), total_sq + batch.dot(batch), \
+            drawn + len(batch)
+        mean = total / drawn
+        std_err = np.sqrt(max(total_sq / drawn - mean ** 2, 0.0) / max(drawn - 1, 1))
+        if drawn >= limit or (half_width is not None and z * std_err <= half_width):
+            return mean, std_err
+
+
+def approx_clustering_coeff(graph_obj, samples=None, half_width=None, confidence=0.95,
+                            batch_size=100000, max_samples=10 ** 8, seed=None):
+    """
+    Function to estimate the clustering coefficient of a given graph by sampling wedges
+    (see `wedge_samples`), faster than `clustering_coeff` on large graphs. Either a number of
+    `samples` is drawn, or batches are drawn until the confidence interval of the estimate
+    is at most `half_width` on either side.
+
+    Args:
+        graph_obj : NetworkX graph object or SignedGraph
+        samples : number of wedges to sample. Default: None
+        half_width : target half-width of the confidence interval. Default: None
+        confidence : confidence level of the interval. Default: 0.95
+        batch_size : number of wedges sampled at once. Default: 100000
+        max_samples : maximum number of wedges sampled when `half_width` is given.
+                      Default: 10^8
+        seed : seed of the random number generator. Default: None
+
+    Returns:
+        2-tuple : (estimate of the clustering coefficient, standard error of the estimate)
+    """
+    return _approx_coeff(graph_obj, False, samples, half_width, confidence, batch_size,
+                         max_samples, seed)
+
+
+def approx_sign_clustering_coeff(graph_obj, samples=None, half_width=None, confidence=0.95,
+                                 batch_size=100000, max_samples=10 ** 8, seed=None):
+    """
+    Function to estimate the signed clustering coefficient of a given graph by sampling
+    wedges, as in `approx_clustering_coeff`.
+
+    Args:
+        graph_obj : NetworkX graph object or SignedGraph
+        samples : number of wedges to sample. Default: None
+        half_width : target half-width of the confidence interval. Default: None
+        confidence : confidence level of the interval. Default: 0.95
+        batch_size : number of wedges sampled at once. Default: 100000
+        max_samples : maximum number of wedges sampled when `half_width` is given.
+                      Default: 10^8
+        seed : seed of the random number generator. Default: None
+
+    Returns:
+        2-tuple : (estimate of the signed clustering coefficient, standard error of the
+                   estimate)
+    """
+    return _approx_coeff(graph_obj, True, samples, half_width, confidence, batch_size,
+                         max_samples, seed)
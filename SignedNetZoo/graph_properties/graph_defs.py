@@ -1,31 +1,153 @@
+import weakref
 import networkx as nx
 import numpy as np
 import scipy.sparse as ssp
+import scipy.sparse.linalg as sspl
+
+from ..signed_graph import SignedGraph
+
+# Matrix bundles of the SignedGraphs seen so far, dropped along with the graphs.
+_bundles = weakref.WeakKeyDictionary()
+
+
+def _lazy(func):
+    # property computed on first access and stored in the bundle
+    name = func.__name__
+
+    def getter(self):
+        if name not in self._matrices:
+            self._matrices[name] = func(self)
+        return self._matrices[name]
+
+    getter.__doc__ = func.__doc__
+    return property(getter)
+
+
+class MatrixBundle(object):
+    """
+    Class holding the matrices of a graph used by the functions in `graph_properties`.
+    Each matrix is computed from the adjacency matrix on first access and kept, so a
+    function needing several of them converts the graph to a matrix only once, and the
+    bundle of a SignedGraph is shared by all calls (see `get_matrix_bundle`). The matrices
+    are shared, and should not be modified in place.
+
+    Arguments:
+        adj_mat : n x n sparse adjacency matrix
+    """
+
+    def __init__(self, adj_mat):
+        self._matrices = {'A': adj_mat}
+
+    @property
+    def A(self):
+        """adjacency matrix A"""
+        return self._matrices['A']
+
+    @_lazy
+    def abs_A(self):
+        """absolute adjacency matrix |A|"""
+        return abs(self.A)
+
+    @_lazy
+    def sym_A(self):
+        """symmetric adjacency matrix A + A^T"""
+        return (self.A + self.A.T).tocsr()
+
+    @_lazy
+    def abs_sym_A(self):
+        """absolute symmetric adjacency matrix |A| + |A^T|"""
+        return (self.abs_A + self.abs_A.T).tocsr()
+
+    @_lazy
+    def abs_degrees(self):
+        """row sums of |A|"""
+        return np.asarray(self.abs_A.sum(axis=1)).reshape(-1)
+
+    @_lazy
+    def abs_sym_degrees(self):
+        """row sums of |A| + |A^T|"""
+        return self.abs_degrees + np.asarray(self.abs_A.sum(axis=0)).reshape(-1)
+
+    @_lazy
+    def sym_degrees(self):
+        """row sums of A + A^T"""
+        return np.asarray(self.A.sum(axis=1)).reshape(-1) + \
+            np.asarray(self.A.sum(axis=0)).reshape(-1)
+
+
+def _node_names(graph_obj):
+    # object array of the nodes, in the order of the rows of the adjacency matrix
+    if isinstance(graph_obj, SignedGraph) and graph_obj.node_ids is not None:
+        return np.asarray(graph_obj.node_ids, dtype=object)
+    nodes = np.empty(graph_obj.number_of_nodes(), dtype=object)
+    nodes[:] = list(graph_obj.nodes())
+    return nodes
+
+
+def get_matrix_bundle(graph_obj):
+    """
+    This function returns the MatrixBundle of a graph. The bundle of a SignedGraph is
+    created on first use and kept as long as the graph, so all the functions called on it
+    share its matrices; the arrays of a SignedGraph should therefore not be modified in
+    place. Networkx graphs can be changed at any time, so a new bundle is built on every
+    call for them: convert them with `SignedGraph.from_networkx` to share the matrices
+    across calls.
+
+    Arguments:
+        graph_obj : Networkx graph object or SignedGraph
+
+    Returns:
+        MatrixBundle of the graph
+    """
+    if not isinstance(graph_obj, SignedGraph):
+        return MatrixBundle(ssp.csr_matrix(nx.adjacency_matrix(graph_obj)))  # sparse matrix
+    bundle = _bundles.get(graph_obj)
+    if bundle is None:
+        bundle = MatrixBundle(graph_obj.to_scipy())
+        _bundles[graph_obj] = bundle
+    return bundle
+
+
+def clear_matrix_bundle(graph_obj=None):
+    """
+    This function drops the cached MatrixBundle of a SignedGraph, or of all graphs, to free
+    the memory of its matrices before the graph itself is dropped.
+
+    Arguments:
+        graph_obj : SignedGraph. Default: None (all graphs)
+    """
+    if graph_obj is None:
+        _bundles.clear()
+    else:
+        _bundles.pop(graph_obj, None)
 
 
 def get_adjacency_matrix(graph_obj, meta_data=False):
     """
-    This function returns a n x n adjacency matrix given a networkx graph object.
+    This function returns a n x n adjacency matrix given a networkx graph object or a
+    SignedGraph.
 
     Arguments:
-        graph_obj : Networkx graph object
+        graph_obj : Networkx graph object or SignedGraph
         meta_data : Argument to toggle to get meta_data of graph optionally. Default=False
 
     Returns:
         If meta_data is True, then a 2-tuple : (adjacency matrix, meta-data dictionary)
         If meta_data is False, then a 2-tuple : (adjacency matrix, None)
         Please note adjacency matrix returned is in sparse format. Use `.todense()` to convert
-        to dense format
+        to dense format. It is shared with other calls on the same graph, so it should not be
+        modified in place
     """
-    adj_mat = nx.adjacency_matrix(graph_obj)  # this is a sparse matrix
+    adj_mat = get_matrix_bundle(graph_obj).A
     metas = None
     if meta_data:
         metas = {}
-        metas['density'] = adj_mat.getnnz() / (adj_mat.shape[0] * adj_mat.shape[1])
-        metas['positive'] = (adj_mat > 0).getnnz()
-        metas['negative'] = (adj_mat < 0).getnnz()
-        metas['links'] = adj_mat.getnnz()
-        metas['average_links'] = adj_mat.getnnz() / adj_mat.shape[0]
+        links = int(np.count_nonzero(adj_mat.data))
+        metas['density'] = links / (adj_mat.shape[0] * adj_mat.shape[1])
+        metas['positive'] = int(np.count_nonzero(adj_mat.data > 0))
+        metas['negative'] = int(np.count_nonzero(adj_mat.data < 0))
+        metas['links'] = links
+        metas['average_links'] = links / adj_mat.shape[0]
     return (adj_mat, metas)
 
 
@@ -35,14 +157,12 @@ def get_absolute_adjacency_matrix(graph_obj):
     entries are absolute values of the weights between the edges
 
     Arguments:
-        graph_obj : Networkx graph object
+        graph_obj : Networkx graph object or SignedGraph
 
     Returns:
         n x n absolute adjacency matrix (sparse)
     """
-    adj_mat, _ = get_adjacency_matrix(graph_obj, False)
-    adj_mat = abs(adj_mat)
-    return adj_mat
+    return get_matrix_bundle(graph_obj).abs_A
 
 
 def get_symmetric_adjacency_matrix(graph_obj):
@@ -51,14 +171,12 @@ def get_symmetric_adjacency_matrix(graph_obj):
     adjacency matrix and its transpose. This provides symmetry.
 
     Arguments:
-        graph_obj : Networkx graph object
+        graph_obj : Networkx graph object or SignedGraph
 
     Returns:
         n x n matrix (sparse)
     """
-    adj_mat, _ = get_adjacency_matrix(graph_obj, False)
-    adj_mat_t = adj_mat.transpose()
-    return adj_mat + adj_mat_t
+    return get_matrix_bundle(graph_obj).sym_A
 
 
 def get_absolute_symmetric_adjacency_matrix(graph_obj):
@@ -67,14 +185,12 @@ def get_absolute_symmetric_adjacency_matrix(graph_obj):
     absolute adjacency matrix and its transpose. This provides symmetry.
 
     Arguments:
-        graph_obj : Networkx graph object
+        graph_obj : Networkx graph object or SignedGraph
 
     Returns:
         n x n matrix (sparse)
     """
-    abs_adj_mat = get_absolute_adjacency_matrix(graph_obj)
-    abs_adj_mat_t = abs_adj_mat.transpose()
-    return abs_adj_mat + abs_adj_mat_t
+    return get_matrix_bundle(graph_obj).abs_sym_A
 
 
 def get_absolute_diagonal_degree_matrix(graph_obj):
@@ -83,14 +199,13 @@ def get_absolute_diagonal_degree_matrix(graph_obj):
     Dii = sum |Aij| for all j
 
     Arguments:
-        graph_obj : Networkx graph object
+        graph_obj : Networkx graph object or SignedGraph
 
     Returns:
         n x n matrix (sparse)
     """
-    abs_adj_mat = get_absolute_adjacency_matrix(graph_obj)
-    diag_entries = np.array(abs_adj_mat.sum(axis=1)).reshape(-1)
-    return ssp.coo_matrix(np.diag(diag_entries))
+    diag_entries = get_matrix_bundle(graph_obj).abs_degrees
+    return _diagonal_matrix(diag_entries)
 
 
 def get_absolute_symmetric_diagonal_degree_matrix(graph_obj):
@@ -99,11 +214,125 @@ def get_absolute_symmetric_diagonal_degree_matrix(graph_obj):
     Eii = sum |Bij| for all j
 
     Arguments:
-        graph_obj : Networkx graph object
+        graph_obj : Networkx graph object or SignedGraph
+
+    Returns:
+        n x n matrix (sparse)
+    """
+    diag_entries = get_matrix_bundle(graph_obj).abs_sym_degrees
+    return _diagonal_matrix(diag_entries)
+
+
+def _diagonal_matrix(diag_entries):
+    # sparse diagonal matrix without explicit zeros
+    mat = ssp.diags(diag_entries, format='csr', dtype=diag_entries.dtype)
+    mat.eliminate_zeros()
+    return mat.tocoo()
+
+
+def _inv_sqrt(degrees):
+    # D^(-1/2), with 0 for nodes of degree 0
+    inv_sqrt = np.zeros(len(degrees))
+    nonzero = degrees != 0
+    inv_sqrt[nonzero] = 1.0 / np.sqrt(degrees[nonzero])
+    return inv_sqrt
+
+
+def get_signed_laplacian(graph_obj):
+    """
+    This function returns the signed Laplacian L = E - B, where B is the symmetric adjacency
+    matrix A + A^T and E is the diagonal matrix of the absolute degrees Eii = sum |Bij|.
+    L is positive semi-definite, and singular iff the graph has a balanced component.
+
+    Arguments:
+        graph_obj : Networkx graph object or SignedGraph
 
     Returns:
         n x n matrix (sparse)
     """
-    abs_sym_adj_mat = get_absolute_symmetric_adjacency_matrix(graph_obj)
-    diag_entries = np.array(abs_sym_adj_mat.sum(axis=1)).reshape(-1)
-    return ssp.coo_matrix(np.diag(diag_entries))
+    return _signed_laplacian(get_matrix_bundle(graph_obj))
+
+
+def _signed_laplacian(bundle):
+    return (_diagonal_matrix(bundle.abs_sym_degrees) - bundle.sym_A).tocsr()
+
+
+def get_normalized_signed_laplacian(graph_obj):
+    """
+    This function returns the normalized signed Laplacian I - E^(-1/2) B E^(-1/2), where B
+    and E are as in `get_signed_laplacian`. Rows and columns of isolated nodes are 0.
+
+    Arguments:
+        graph_obj : Networkx graph object or SignedGraph
+
+    Returns:
+        n x n matrix (sparse)
+    """
+    return _normalized_signed_laplacian(get_matrix_bundle(graph_obj))
+
+
+def _normalized_signed_laplacian(bundle):
+    inv_sqrt = _diagonal_matrix(_inv_sqrt(bundle.abs_sym_degrees))
+    return (_diagonal_matrix((bundle.abs_sym_degrees != 0).astype(np.float64)) -
+            inv_sqrt.dot(bundle.sym_A).dot(inv_sqrt)).tocsr()
+
+
+def get_opposing_laplacian(graph_obj):
+    """
+    This function returns the opposing Laplacian L = D - B, where B is the symmetric
+    adjacency matrix A + A^T and D is the diagonal matrix of the signed degrees
+    Dii = sum Bij.
+
+    Arguments:
+        graph_obj : Networkx graph object or SignedGraph
+
+    Returns:
+        n x n matrix (sparse)
+    """
+    bundle = get_matrix_bundle(graph_obj)
+    return (_diagonal_matrix(bundle.sym_degrees) - bundle.sym_A).tocsr()
+
+
+def get_laplacian_operator(graph_obj, kind='signed'):
+    """
+    This function returns one of the Laplacians above as a `scipy.sparse.linalg.LinearOperator`.
+    Products are computed as d * x - (A x + A^T x) from the adjacency matrix, so neither
+    A + A^T nor the Laplacian itself is built. Such operators can be passed directly to
+    `scipy.sparse.linalg.eigsh` or `lobpcg`.
+
+    Arguments:
+        graph_obj : Networkx graph object or SignedGraph
+        kind : 'signed', 'normalized' or 'opposing'. Default: 'signed'
+
+    Returns:
+        n x n symmetric LinearOperator
+    """
+    bundle = get_matrix_bundle(graph_obj)
+    adj_mat = bundle.A.astype(np.float64)
+    adj_mat_t = adj_mat.T.tocsr()
+
+    if kind == 'signed':
+        degrees, scale = bundle.abs_sym_degrees.astype(np.float64), None
+    elif kind == 'normalized':
+        scale = _inv_sqrt(bundle.abs_sym_degrees)
+        degrees = (bundle.abs_sym_degrees != 0).astype(np.float64)
+    elif kind == 'opposing':
+        degrees, scale = bundle.sym_degrees.astype(np.float64), None
+    else:
+        raise ValueError("kind should be one of 'signed', 'normalized' or 'opposing'")
+
+    def matmat(x):
+        x = np.asarray(x, dtype=np.float64)
+        column = x.ndim == 1
+        if column:
+            x = x.reshape(-1, 1)
+        y = x if scale is None else scale[:, None] * x
+        y = adj_mat.dot(y) + adj_mat_t.dot(y)
+        if scale is not None:
+            y = scale[:, None] * y
+        y = degrees[:, None] * x - y
+        return y.reshape(-1) if column else y
+
+    n = adj_mat.shape[0]
+    return sspl.LinearOperator((n, n), matvec=matmat, matmat=matmat, rmatvec=matmat,
+                               rmatmat=matmat, dtype=np.float64)
@@ -0,0 +1,142 @@
+import numpy as np
+import scipy.sparse as ssp
+
+from scipy.linalg import eigh_tridiagonal
+from scipy.sparse.linalg import lobpcg
+from scipy.special import logsumexp
+
+from . import graph_defs as gd
+
+
+def algebraic_conflict(graph_obj, k=1, normalized=False, tol=None, maxiter=500, seed=None,
+                       return_vectors=False):
+    """
+    Function to get the smallest eigenvalues of the signed Laplacian of a given graph (see
+    `get_signed_laplacian`). The smallest one, the algebraic conflict, is 0 iff the graph has
+    a balanced connected component, and grows as the graph gets further from balance.
+    Isolated nodes, which would always give 0, are left out. The eigenvalues are found with
+    LOBPCG and a Jacobi preconditioner, so only sparse matrices are built.
+
+    Args:
+        graph_obj : NetworkX graph object or SignedGraph
+        k : number of eigenvalues. Default: 1
+        normalized : Argument to toggle to use the normalized signed Laplacian.
+                     Default: False
+        tol : tolerance of LOBPCG. Default: None (LOBPCG's default)
+        maxiter : maximum number of LOBPCG iterations. Default: 500
+        seed : seed of the random initial vectors. Default: None
+        return_vectors : Argument to toggle to also get the eigenvectors. Default: False
+
+    Returns:
+        array of the k smallest eigenvalues in increasing order. If return_vectors is True,
+        a 2-tuple : (eigenvalues, n x k array of eigenvectors, with 0 for isolated nodes)
+    """
+    return _smallest_eigenpairs(gd.get_matrix_bundle(graph_obj), k, normalized, tol, maxiter,
+                                seed, return_vectors)
+
+
+def _smallest_eigenpairs(bundle, k, normalized, tol, maxiter, seed, return_vectors):
+    active = np.flatnonzero(bundle.abs_sym_degrees)
+    if normalized:
+        laplacian = gd._normalized_signed_laplacian(bundle)
+    else:
+        laplacian = gd._signed_laplacian(bundle)
+    laplacian = laplacian[active][:, active].astype(np.float64)
+    m = len(active)
+    assert 0 < k <= m, "k argument out of range"
+
+    if m <= max(5 * k, 100):
+        vals, vecs = np.linalg.eigh(laplacian.toarray())
+    else:
+        rng = np.random.RandomState(seed)
+        # the diagonal is 0 only for nodes whose edges are all positive self-loops
+        diagonal = laplacian.diagonal()
+        precond = ssp.diags(1.0 / np.where(diagonal > 0, diagonal, 1))
+        vals, vecs = lobpcg(laplacian, rng.randn(m, k), M=precond, tol=tol, maxiter=maxiter,
+                            largest=False)
+    order = np.argsort(vals)[:k]
+    vals = vals[order]
+    if not return_vectors:
+        return vals
+
+    full_vecs = np.zeros((bundle.A.shape[0], k))
+    full_vecs[active] = vecs[:, order]
+    return vals, full_vecs
+
+
+def _log_quadratic_forms(matmat, probes, beta, steps):
+    # log(z^T exp(beta M) z) for each column z of `probes`, by Lanczos quadrature with
+    # `steps` steps, running one Lanczos process per column at once
+    n, p = probes.shape
+    norms = np.linalg.norm(probes, axis=0)
+    prev_basis, basis = np.zeros((n, p)), probes / norms
+    alphas, betas = np.zeros((steps, p)), np.zeros((steps, p))
+    lengths = np.full(p, steps)
+    active = np.ones(p, dtype=bool)
+    beta_prev = np.zeros(p)
+    for step in range(steps):
+        w = matmat(basis) - beta_prev * prev_basis
+        alphas[step] = (basis * w).sum(axis=0)
+        w -= alphas[step] * basis
+        betas[step] = np.linalg.norm(w, axis=0)
+        # a column whose Krylov space is exhausted is done
+        scale = np.maximum(np.abs(alphas[:step + 1]).max(axis=0), 1)
+        done = active & (betas[step] <= 1e-10 * scale)
+        lengths[done] = step + 1
+        active &= ~done
+        if not active.any():
+            break
+        betas[step, ~active] = 0
+        prev_basis, basis = basis, w / np.where(active, betas[step], 1)
+        basis[:, ~active] = 0
+        beta_prev = betas[step]
+
+    logs = np.empty(p)
+    for col in range(p):
+        length = lengths[col]
+        theta, vecs = eigh_tridiagonal(alphas[:length, col], betas[:length - 1, col])
+        logs[col] = 2 * np.log(norms[col]) + logsumexp(beta * theta, b=vecs[0] ** 2)
+    return logs
+
+
+def walk_balance(graph_obj, beta=1.0, num_probes=100, steps=30, seed=None):
+    """
+    Function to get the walk-based degree of balance of a given graph, defined by E. Estrada
+    and M. Benzi in "Walk-based measure of balance in signed networks" as
+
+        K = trace(exp(beta B)) / trace(exp(beta |B|))
+
+    where B is the symmetric adjacency matrix A + A^T. K is the weighted fraction of closed
+    walks which are positive: it is 1 for a balanced graph and decreases as more cycles are
+    negative. Both traces are estimated with Hutchinson's estimator over `num_probes`
+    Rademacher vectors and Lanczos quadrature, computed in log space so that they do not
+    overflow on large graphs.
+
+    Args:
+        graph_obj : NetworkX graph object or SignedGraph
+        beta : inverse temperature weighting longer walks less. Default: 1.0
+        num_probes : number of random probe vectors. Default: 100
+        steps : number of Lanczos steps per probe. Default: 30
+        seed : seed of the random probe vectors. Default: None
+
+    Returns:
+        2-tuple : (estimate of K, standard error of the estimate)
+    """
+    bundle = gd.get_matrix_bundle(graph_obj)
+    sym_adj_mat = bundle.sym_A.astype(np.float64)
+    abs_sym_adj_mat = bundle.abs_sym_A.astype(np.float64)
+    n = sym_adj_mat.shape[0]
+    probes = np.random.RandomState(seed).choice([-1.0, 1.0], size=(n, num_probes))
+    steps = min(steps, n)
+
+    signed = _log_quadratic_forms(sym_adj_mat.dot, probes, beta, steps)
+    unsigned = _log_quadratic_forms(abs_sym_adj_mat.dot, probes, beta, steps)
+
+    # ratio of means over the same probes, and its standard error by the delta method
+    shift = max(signed.max(), unsigned.max())
+    signed, unsigned = np.exp(signed - shift), np.exp(unsigned - shift)
+    ratio = signed.mean() / unsigned.mean()
+    residuals = signed - ratio * unsigned
+    std_err = np.sqrt(residuals.var(ddof=1) / num_probes) / unsigned.mean() \
+        if num_probes > 1 else np.inf
+    return ratio, std_err
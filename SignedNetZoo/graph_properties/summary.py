@@ -0,0 +1,72 @@
+import numpy as np
+
+from . import graph_defs as gd
+from .triangles import _edge_keys, _edge_lookup
+
+
+def summarize(graph_obj):
+    """
+    Function to get the summary statistics of a signed graph in one pass over its edge
+    arrays, using NumPy reductions only. The edges are the nonzero entries of the adjacency
+    matrix, so each edge of an undirected graph appears in both directions.
+
+    Args:
+        graph_obj : NetworkX graph object or SignedGraph
+
+    Returns:
+        dict with the keys
+            'nodes', 'edges', 'positive', 'negative', 'self_loops' : counts
+            'density' : edges / nodes^2
+            'average_links' : edges / nodes
+            'out_degree', 'in_degree' : arrays of degrees indexed by node
+            'positive_out_degree', 'negative_out_degree',
+            'positive_in_degree', 'negative_in_degree' : arrays of signed degrees
+            'out_degree_distribution', 'in_degree_distribution' : arrays whose entry k is
+                the number of nodes of degree k
+            'reciprocal_edges' : number of edges u -> v, u != v, such that v -> u is an edge
+            'reciprocity' : reciprocal_edges / edges
+            'reciprocal_sign_agreement' : fraction of the reciprocal edges whose reverse edge
+                has the same sign, nan if there are none
+    """
+    # a sorted copy of the adjacency matrix, without explicit zeros
+    adj_mat = gd.get_matrix_bundle(graph_obj).A.sorted_indices()
+    adj_mat.eliminate_zeros()
+    n = adj_mat.shape[0]
+    keys = _edge_keys(adj_mat)
+    src, dst = keys // max(n, 1), adj_mat.indices.astype(np.int64)
+    positive = adj_mat.data > 0
+    num_edges = len(src)
+
+    def degrees(nodes, mask=None):
+        return np.bincount(nodes if mask is None else nodes[mask], minlength=n)
+
+    out_degree, in_degree = degrees(src), degrees(dst)
+    positive_out_degree, positive_in_degree = degrees(src, positive), degrees(dst, positive)
+
+    # join each edge with its reverse on the sorted keys source * n + target
+    reverse_signs = _edge_lookup(keys, np.where(positive, 1, -1), dst * n + src)
+    reciprocal = (reverse_signs != 0) & (src != dst)
+    num_reciprocal = int(reciprocal.sum())
+    agreement = positive[reciprocal] == (reverse_signs[reciprocal] > 0)
+
+    num_positive = int(positive.sum())
+    return {
+        'nodes': n,
+        'edges': num_edges,
+        'positive': num_positive,
+        'negative': num_edges - num_positive,
+        'self_loops': int(np.count_nonzero(src == dst)),
+        'density': num_edges / float(n * n) if n > 0 else float('nan'),
+        'average_links': num_edges / float(n) if n > 0 else float('nan'),
+        'out_degree': out_degree,
+        'in_degree': in_degree,
+        'positive_out_degree': positive_out_degree,
+        'negative_out_degree': out_degree - positive_out_degree,
+        'positive_in_degree': positive_in_degree,
+        'negative_in_degree': in_degree - positive_in_degree,
+        'out_degree_distribution': np.bincount(out_degree),
+        'in_degree_distribution': np.bincount(in_degree),
+        'reciprocal_edges': num_reciprocal,
+        'reciprocity': num_reciprocal / float(num_edges) if num_edges > 0 else float('nan'),
+        'reciprocal_sign_agreement': agreement.mean() if num_reciprocal > 0 else float('nan'),
+    }
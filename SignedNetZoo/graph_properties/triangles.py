@@ -0,0 +1,264 @@
+import numpy as np
+import scipy.sparse as ssp
+
+from concurrent.futures import ProcessPoolExecutor
+
+from . import graph_defs as gd
+
+# Arrays of the graph being counted, set in each worker process.
+_worker_mats = None
+
+
+def _init_worker(*mats):
+    global _worker_mats
+    _worker_mats = mats
+
+
+def _block_counts(start, stop, mats=None):
+    # Closed wedges i -> k -> j with i -> j, for the rows start, ..., stop - 1. The products
+    # only hold the wedges starting in the block, and are freed before the next block.
+    adj_mat, abs_adj_mat = _worker_mats if mats is None else mats
+    rows, abs_rows = adj_mat[start:stop], abs_adj_mat[start:stop]
+    signed = rows.multiply(rows.dot(adj_mat)).sum(axis=1)
+    unsigned = abs_rows.multiply(abs_rows.dot(abs_adj_mat)).sum(axis=1)
+    return np.asarray(signed).reshape(-1), np.asarray(unsigned).reshape(-1)
+
+
+def _row_blocks(adj_mat, block_wedges):
+    # Split the rows into blocks of consecutive rows starting at most about `block_wedges`
+    # wedges each, which bounds the number of entries of each block product.
+    n = adj_mat.shape[0]
+    out_degree = np.diff(adj_mat.indptr)
+    rows = np.repeat(np.arange(n), out_degree)
+    wedges = np.cumsum(np.bincount(rows, weights=out_degree[adj_mat.indices], minlength=n))
+    total = wedges[-1] if n > 0 else 0
+    cuts = np.searchsorted(wedges, np.arange(block_wedges, total, block_wedges), side='right')
+    bounds = np.unique(np.concatenate([[0], cuts, [n]]))
+    return bounds[:-1], bounds[1:]
+
+
+def triangle_counts(graph_obj, block_wedges=None, processes=1, local=False):
+    """
+    Function to count the triangles and wedges of a graph used by the clustering
+    coefficients. Writing A for the adjacency matrix, these are
+
+        triangles = sum(|A| * |A|^2), signed_triangles = sum(A * A^2), wedges = sum(|A|^2)
+
+    where * is the element-wise product. A^2 is never built: the rows are processed in
+    blocks whose products hold at most about `block_wedges` entries, so the memory used
+    is proportional to the graph, and the blocks can be processed by a pool of processes.
+    The number of wedges is obtained from the degrees alone.
+
+    If `local` is True, the sums are only taken over the columns, giving for each node i
+    the triangles and wedges i -> k -> j starting at i.
+
+    Args:
+        graph_obj : NetworkX graph object or SignedGraph
+        block_wedges : maximum number of wedges per block of rows.
+                       Default: None (4 times the number of edges, at least 2^22)
+        processes : number of worker processes, None for the number of CPUs. Default: 1
+        local : Argument to toggle to get the counts of each node. Default: False
+
+    Returns:
+        dict with keys 'triangles', 'signed_triangles' and 'wedges', whose values are
+        arrays indexed by node if `local` is True
+    """
+    bundle = gd.get_matrix_bundle(graph_obj)
+    adj_mat, abs_adj_mat = bundle.A, bundle.abs_A
+    if block_wedges is None:
+        block_wedges = max(4 * adj_mat.nnz, 1 << 22)
+    starts, stops = _row_blocks(adj_mat, block_wedges)
+
+    if processes == 1 or len(starts) <= 1:
+        counts = [_block_counts(start, stop, (adj_mat, abs_adj_mat))
+                  for start, stop in zip(starts, stops)]
+    else:
+        with ProcessPoolExecutor(max_workers=processes, initializer=_init_worker,
+                                 initargs=(adj_mat, abs_adj_mat)) as executor:
+            counts = list(executor.map(_block_counts, starts, stops))
+
+    signed = np.concatenate([block[0] for block in counts] + [np.zeros(0, adj_mat.dtype)])
+    unsigned = np.concatenate([block[1] for block in counts] + [np.zeros(0, adj_mat.dtype)])
+    if local:
+        return {'triangles': unsigned, 'signed_triangles': signed,
+                'wedges': abs_adj_mat.dot(bundle.abs_degrees)}
+
+    in_degree = np.asarray(abs_adj_mat.sum(axis=0)).reshape(-1)
+    return {'triangles': unsigned.sum(), 'signed_triangles': signed.sum(),
+            'wedges': in_degree.dot(bundle.abs_degrees)}
+
+
+def _weighted_positions(indptr, cum_weights, rows, uniform):
+    # For each row, the position in the CSR arrays of an entry drawn with probability
+    # proportional to its weight, where cum_weights[p] is the sum of the weights before p.
+    low, high = cum_weights[indptr[rows]], cum_weights[indptr[rows + 1]]
+    pos = np.searchsorted(cum_weights, low + uniform * (high - low), side='right') - 1
+    return np.clip(pos, indptr[rows], indptr[rows + 1] - 1)
+
+
+def wedge_samples(graph_obj, batch_size=100000, seed=None):
+    """
+    Generator of batches of wedges i -> k -> j drawn with probability proportional to
+    |Aik| |Akj|, which is the weighting of the wedges in `triangle_counts`. For each wedge,
+    the closing weight |Aij| and the signed closing weight sign(Aik) sign(Akj) Aij are
+    returned, so that their means estimate the clustering and signed clustering
+    coefficients. The middle node k is drawn with probability proportional to the product
+    of its absolute in- and out-degrees, and then i and j among its in- and out-neighbours,
+    all vectorized over the batch.
+
+    Args:
+        graph_obj : NetworkX graph object or SignedGraph
+        batch_size : number of wedges in each batch. Default: 100000
+        seed : seed of the random number generator. Default: None
+
+    Returns:
+        generator of 2-tuples of arrays : (closing weights, signed closing weights)
+    """
+    bundle = gd.get_matrix_bundle(graph_obj)
+    adj_mat = bundle.A.sorted_indices()
+    adj_mat_t = adj_mat.T.tocsr()
+    adj_mat_t.sort_indices()
+    n = adj_mat.shape[0]
+
+    def cumulative(values):
+        return np.concatenate([[0], np.cumsum(np.abs(values), dtype=np.float64)])
+
+    in_degree = np.asarray(bundle.abs_A.sum(axis=0)).reshape(-1)
+    cum_middle = cumulative(in_degree * bundle.abs_degrees)
+    if cum_middle[-1] == 0:
+        raise ValueError("graph has no wedges")
+    cum_out, cum_in = cumulative(adj_mat.data), cumulative(adj_mat_t.data)
+    keys = _edge_keys(adj_mat)
+    rng = np.random.RandomState(seed)
+
+    while True:
+        middle = np.searchsorted(cum_middle, rng.uniform(0, cum_middle[-1], batch_size),
+                                 side='right') - 1
+        middle = np.clip(middle, 0, n - 1)
+        first = _weighted_positions(adj_mat_t.indptr, cum_in, middle, rng.uniform(size=batch_size))
+        second = _weighted_positions(adj_mat.indptr, cum_out, middle, rng.uniform(size=batch_size))
+
+        query = adj_mat_t.indices[first].astype(np.int64) * n + adj_mat.indices[second]
+        closing = _edge_lookup(keys, adj_mat.data, query).astype(np.float64)
+        signs = np.sign(adj_mat_t.data[first]) * np.sign(adj_mat.data[second])
+        yield np.abs(closing), signs * closing
+
+
+def _edge_lookup(keys, weights, query):
+    # weights of the edges with the given keys (source * n + target), 0 for missing edges
+    if len(keys) == 0:
+        return np.zeros(len(query), dtype=weights.dtype)
+    pos = np.minimum(np.searchsorted(keys, query), len(keys) - 1)
+    return np.where(keys[pos] == query, weights[pos], 0)
+
+
+def _edge_keys(mat):
+    # keys source * n + target of the entries of a CSR matrix with sorted indices
+    rows = np.repeat(np.arange(mat.shape[0], dtype=np.int64), np.diff(mat.indptr))
+    return rows * mat.shape[0] + mat.indices
+
+
+def _block_census(start, stop, mats=None):
+    # Census of the triangles u < v < w (in degree order) with u in start, ..., stop - 1
+    oriented, adj_mat, oriented_keys, adj_keys = _worker_mats if mats is None else mats
+    n = oriented.shape[0]
+
+    # wedges u -> v -> w of the oriented graph, closed by an edge u -> w
+    first = np.arange(oriented.indptr[start], oriented.indptr[stop])
+    u = np.repeat(np.arange(start, stop), np.diff(oriented.indptr[start:stop + 1]))
+    v = oriented.indices[first]
+    lengths = np.diff(oriented.indptr)[v]
+    offsets = np.repeat(oriented.indptr[v] - np.cumsum(lengths) + lengths, lengths)
+    w = oriented.indices[offsets + np.arange(lengths.sum())]
+    u, v = np.repeat(u, lengths), np.repeat(v, lengths)
+    closed = _edge_lookup(oriented_keys, oriented.data, u.astype(np.int64) * n + w) != 0
+    nodes = [u[closed].astype(np.int64), v[closed].astype(np.int64), w[closed]]
+
+    def weight(i, j):
+        return _edge_lookup(adj_keys, adj_mat.data, nodes[i] * n + nodes[j])
+
+    weights = {(i, j): weight(i, j) for i in range(3) for j in range(3) if i != j}
+    codes = []
+    for a, b, x in [(0, 1, 2), (0, 2, 1), (1, 0, 2), (1, 2, 0), (2, 0, 1), (2, 1, 0)]:
+        closing = weights[(a, b)]
+        for dir_ax, w_ax in [(0, weights[(a, x)]), (1, weights[(x, a)])]:
+            for dir_xb, w_xb in [(0, weights[(x, b)]), (1, weights[(b, x)])]:
+                mask = (closing != 0) & (w_ax != 0) & (w_xb != 0)
+                codes.append(2 * (8 * dir_ax + 4 * (w_ax[mask] < 0) + 2 * dir_xb +
+                                  (w_xb[mask] < 0)) + (closing[mask] < 0))
+    codes = np.concatenate(codes + [np.zeros(0, dtype=np.int64)]).astype(np.int64)
+    return np.bincount(codes, minlength=32).reshape(16, 2)
+
+
+def triad_census(graph_obj, block_wedges=None, processes=1):
+    """
+    Function to count the 16 types of signed directed triads of "Signed Networks in Social
+    Media" by J. Leskovec, D. Huttenlocher and J. Kleinberg, used to compare the balance and
+    status theories. Each triad is an edge A -> B, whose sign is predicted, with a node X
+    linked to both A and B, and its type is given by the directions and signs of the edges
+    between A and X and between X and B, indexed as
+
+        type = 8 * (X -> A) + 4 * (A-X edge is negative) + 2 * (B -> X) + (X-B edge is negative)
+
+    so that type 0 is A -+-> X -+-> B. If A and X or X and B are linked both ways, each
+    combination of edges is counted.
+
+    Each triangle of the undirected graph is enumerated once, orienting the edges from lower
+    to higher degree and intersecting sorted neighbour lists in blocks of rows of about
+    `block_wedges` wedges, which can be processed by a pool of processes.
+
+    The expected counts are those under a random shuffling of the signs of all the edges,
+    keeping the directions: each triad keeps its direction pattern, and its three signs are
+    drawn without replacement from the signs of the graph.
+
+    Args:
+        graph_obj : NetworkX graph object or SignedGraph
+        block_wedges : maximum number of wedges per block of rows.
+                       Default: None (4 times the number of edges, at least 2^22)
+        processes : number of worker processes, None for the number of CPUs. Default: 1
+
+    Returns:
+        2-tuple of 16 x 2 arrays : (counts, expected counts), where column 0 is for positive
+        and column 1 for negative edges A -> B
+    """
+    bundle = gd.get_matrix_bundle(graph_obj)
+    adj_mat = bundle.A.sorted_indices()
+    n = adj_mat.shape[0]
+
+    # undirected simple graph, oriented from lower to higher (degree, index)
+    undirected = bundle.abs_sym_A.tocoo()
+    rank = np.empty(n, dtype=np.int64)
+    rank[np.lexsort((np.arange(n), np.diff(bundle.abs_sym_A.indptr)))] = np.arange(n)
+    forward = rank[undirected.row] < rank[undirected.col]
+    oriented = ssp.csr_matrix((np.ones(forward.sum(), dtype=np.int8),
+                               (undirected.row[forward], undirected.col[forward])),
+                              shape=(n, n))
+    oriented.sort_indices()
+
+    if block_wedges is None:
+        block_wedges = max(4 * adj_mat.nnz, 1 << 22)
+    starts, stops = _row_blocks(oriented, block_wedges)
+    mats = (oriented, adj_mat, _edge_keys(oriented), _edge_keys(adj_mat))
+    if processes == 1 or len(starts) <= 1:
+        counts = [_block_census(start, stop, mats) for start, stop in zip(starts, stops)]
+    else:
+        with ProcessPoolExecutor(max_workers=processes, initializer=_init_worker,
+                                 initargs=mats) as executor:
+            counts = list(executor.map(_block_census, starts, stops))
+    counts = np.sum(counts + [np.zeros((16, 2), dtype=np.int64)], axis=0)
+
+    # probability of each pattern of three signs when drawn without replacement
+    num_edges = float(np.count_nonzero(adj_mat.data))
+    num_negative = float(np.count_nonzero(adj_mat.data < 0))
+    num_positive = num_edges - num_negative
+    prob = np.zeros((2, 2, 2))
+    if num_edges >= 3:
+        for signs in np.ndindex(2, 2, 2):
+            k = sum(signs)
+            prob[signs] = np.prod(num_positive - np.arange(3 - k)) * \
+                np.prod(num_negative - np.arange(k)) / np.prod(num_edges - np.arange(3))
+
+    # triads of each direction pattern, spread over the sign patterns
+    by_direction = counts.reshape(2, 2, 2, 2, 2).sum(axis=(1, 3, 4))
+    expected = by_direction[:, None, :, None, None] * prob[None, :, None, :, :]
+    return counts, expected.reshape(16, 2)
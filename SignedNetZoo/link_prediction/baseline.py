@@ -1,4 +1,23 @@
 from ..graph_properties import get_adjacency_matrix
+from ..signed_graph import SignedGraph
+
+
+def _get_edge_weights(G):
+    # weights of all the edges of G
+    from networkx import get_edge_attributes
+    if isinstance(G, SignedGraph):
+        return G.weights.tolist()
+    return list(get_edge_attributes(G, 'weight').values())
+
+
+def _get_reverse_edge_weights(G, required_links):
+    # weight of the edge (b, a) for each (a, b) in required_links, 0 if it does not exist
+    if isinstance(G, SignedGraph):
+        if len(required_links) == 0:
+            return []
+        src, dst = zip(*required_links)
+        return G.edge_weights(dst, src).tolist()
+    return [G[b][a]['weight'] if G.has_edge(b, a) else 0 for a, b in required_links]
 
 
 def uninformative_prediction(G, required_links):
@@ -15,8 +34,7 @@ def uninformative_prediction(G, required_links):
     Returns:
         List of {+1, -1} based on the properties of the graph
     """
-    from networkx import get_edge_attributes
-    edges_weights = list(get_edge_attributes(G, 'weight').values())
+    edges_weights = _get_edge_weights(G)
     edges_parity = [1 if w > 0 else -1 for w in edges_weights]
     if sum(edges_parity) > 0:
         return [1 for _ in required_links]
@@ -41,14 +59,13 @@ def undirected_prediction(G, required_links, default=None):
     Returns:
         List of {+1, -1} based on the properties of the graph
     """
-    from networkx import get_edge_attributes
     if default is None:
-        edges_majority = sum(list(get_edge_attributes(G, 'weight').values()))
+        edges_majority = sum(_get_edge_weights(G))
 
     preds = []
-    for pair in required_links:
-        if G.has_edge(pair[1], pair[0]):
-            if G[pair[1]][pair[0]]['weight'] > 0:
+    for reverse_weight in _get_reverse_edge_weights(G, required_links):
+        if reverse_weight != 0:
+            if reverse_weight > 0:
                 preds.append(1)
             else:
                 preds.append(-1)
@@ -84,9 +101,8 @@ def mult_trans_prediction(G, required_links, default=None):
     Returns:
         List of {+1, -1} based on the properties of the graph
     """
-    from networkx import get_edge_attributes
     if default is None:
-        edges_majority = sum(list(get_edge_attributes(G, 'weight').values()))
+        edges_majority = sum(_get_edge_weights(G))
 
     preds = []
     A, _ = get_adjacency_matrix(G)
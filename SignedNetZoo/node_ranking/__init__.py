@@ -1,2 +1,3 @@
 from .popularity import fans_minus_freaks
-from .centrality import pagerank, negativerank, exponentialrank
+from .centrality import pagerank, negativerank, exponentialrank, exponentialrank_sweep
+from .batch import rank_nodes
@@ -0,0 +1,71 @@
+import numpy as np
+
+from .centrality import _pagerank_group, _exponential_iteration
+from ..graph_properties.graph_defs import get_matrix_bundle, _node_names
+
+# PageRank variants by name, as (signed, symmetric)
+PAGERANK_VARIANTS = {
+    'pagerank': (False, False),
+    'signed_pagerank': (True, False),
+    'sym_pagerank': (False, True),
+    'sym_signed_pagerank': (True, True),
+}
+
+RANKINGS = sorted(list(PAGERANK_VARIANTS) +
+                  ['negativerank', 'exp_pagerank', 'fans_minus_freaks'])
+
+
+def rank_nodes(G, algorithms, alpha=0.8, beta=0.5, mu=0.2, max_iter=100, tol=1e-6):
+    """
+    Function to compute several node rankings of a graph together. The adjacency matrix is
+    built once, the PageRank variants with the same symmetry are iterated together with one
+    sparse matrix product per iteration (see `pagerank`), and rankings needed more than once,
+    such as the PageRank used by Negative Rank, are only computed once.
+
+    Arguments:
+        G : graph to rank (Networkx graph object or SignedGraph)
+        algorithms : list of ranking names, among 'pagerank' (unsigned), 'signed_pagerank',
+                     'sym_pagerank' (symmetric, unsigned), 'sym_signed_pagerank',
+                     'negativerank', 'exp_pagerank' (Exponential Ranking) and
+                     'fans_minus_freaks'
+        alpha : teleportation parameter of the PageRank variants. Default: 0.8
+        beta : parameter for Negative Rank. Default: 0.5
+        mu : mu parameter of Exponential Ranking. Default: 0.2
+        max_iter : maximum number of iterations of each ranking. Default: 100
+        tol : tolerance of the iterations, as in `pagerank` and `exponentialrank`.
+              Default: 1e-6
+
+    Returns:
+        A dictionary with the names of the algorithms as keys, and dictionaries with keys as
+        nodes and values as ranking values as values
+    """
+    for name in algorithms:
+        assert name in RANKINGS, "unknown ranking {}".format(name)
+    bundle = get_matrix_bundle(G)
+    nodes = _node_names(G)
+    values = {}
+
+    # PageRank variants, grouped by symmetry
+    variants = set(PAGERANK_VARIANTS[name] for name in algorithms if name in PAGERANK_VARIANTS)
+    if 'negativerank' in algorithms:
+        variants.update([(False, False), (True, False)])
+    for symmetric in [False, True]:
+        signs = [-1 if signed else 1 for signed in [False, True]
+                 if (signed, symmetric) in variants]
+        if signs:
+            x, _, _ = _pagerank_group(bundle, symmetric, signs, alpha, max_iter, tol)
+            for sign, column in zip(signs, x.T):
+                values[(sign < 0, symmetric)] = column
+
+    for name, variant in PAGERANK_VARIANTS.items():
+        if name in algorithms:
+            values[name] = values[variant]
+    if 'negativerank' in algorithms:
+        values['negativerank'] = values[(True, False)] - beta * values[(False, False)]
+    if 'exp_pagerank' in algorithms:
+        vals, _, _ = _exponential_iteration(bundle.A.T.tocsr(), np.array([mu]), max_iter, tol)
+        values['exp_pagerank'] = vals[:, 0]
+    if 'fans_minus_freaks' in algorithms:
+        values['fans_minus_freaks'] = np.asarray(bundle.A.sign().sum(axis=1)).reshape(-1)
+
+    return {name: dict(zip(nodes, values[name].tolist())) for name in algorithms}
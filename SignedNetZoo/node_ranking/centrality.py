@@ -1,12 +1,81 @@
+import numpy as np
+import scipy.sparse as ssp
+
 from ..graph_properties import get_adjacency_matrix
+from ..graph_properties.graph_defs import get_matrix_bundle, _node_names
+
+
+def _transition(mat):
+    # transposed transition matrix D^-1 M, with D the absolute row sums of M, and the mask of
+    # dangling nodes, whose rows are empty
+    row_sums = np.asarray(abs(mat).sum(axis=1)).reshape(-1).astype(np.float64)
+    dangling = row_sums == 0
+    inv_row_sums = np.where(dangling, 0, 1 / np.where(dangling, 1, row_sums))
+    return ssp.csr_matrix(ssp.diags(inv_row_sums).dot(mat).T, dtype=np.float64), dangling
+
 
+def _power_iteration(matmat, dangling, alpha, max_iter, tol, x):
+    # PageRank iterations on the columns of x, each stopping when its L1 change is below
+    # n * tol. matmat(x_active, active) gives the product of the transposed transition
+    # matrices with the active columns. Returns the final vectors, and the iterations and
+    # last change of each column.
+    n, k = x.shape
+    iterations, errors = np.zeros(k, dtype=int), np.full(k, np.inf)
+    active = np.ones(k, dtype=bool)
+    for i in range(max_iter):
+        x_active = x[:, active]
+        x_new = alpha * (matmat(x_active, active) + x_active[dangling].sum(axis=0) / n) + \
+            (1 - alpha) / n
+        errors[active] = abs(x_new - x_active).sum(axis=0)
+        iterations[active] = i + 1
+        x[:, active] = x_new
+        active &= errors >= n * tol
+        if not active.any():
+            break
+    return x, iterations, errors
+
+
+def _pagerank_matrix(bundle, signed, symmetric):
+    if symmetric:
+        return bundle.sym_A if signed else bundle.abs_sym_A
+    return bundle.A if signed else bundle.abs_A
 
-def pagerank(G, signed=True, symmetric=False, alpha=0.8, max_iter=100):
+
+def _pagerank_group(bundle, symmetric, signs, alpha, max_iter, tol):
+    # PageRank of the unsigned (sign 1) and signed (sign -1) variants in `signs` for the same
+    # symmetry, as the columns of one matrix. If |M signed| = M unsigned, both transition
+    # matrices are P + N and P - N for the positive and negated negative parts P and N of the
+    # signed one, so each iteration is the single product [P N] [x; sign * x].
+    n = bundle.A.shape[0]
+    signed_mat = _pagerank_matrix(bundle, True, symmetric)
+    if len(signs) == 1 or \
+            (abs(signed_mat) != _pagerank_matrix(bundle, False, symmetric)).nnz > 0:
+        results = []
+        for sign in signs:
+            transition_t, dangling = _transition(_pagerank_matrix(bundle, sign < 0, symmetric))
+            results.append(_power_iteration(lambda x, _: transition_t.dot(x), dangling, alpha,
+                                            max_iter, tol, np.full((n, 1), 1.0 / n)))
+        return tuple(np.concatenate(parts, axis=-1) for parts in zip(*results))
+
+    transition_t, dangling = _transition(signed_mat)
+    stacked = ssp.hstack([transition_t.maximum(0), -transition_t.minimum(0)], format='csr')
+    signs = np.asarray(signs, dtype=np.float64)
+    return _power_iteration(lambda x, active: stacked.dot(np.vstack([x, x * signs[active]])),
+                            dangling, alpha, max_iter, tol, np.full((n, len(signs)), 1.0 / n))
+
+
+def pagerank(G, signed=True, symmetric=False, alpha=0.8, max_iter=100, tol=1e-6,
+             diagnostics=False):
     """
     Function to get the PageRank centrality scores for each node in a signed network.
 
+    The scores are computed by power iteration on the sparse adjacency matrix M, which is
+    A, |A|, A + A^T or |A| + |A^T| depending on `signed` and `symmetric`. Each row of M is
+    divided by its sum of absolute weights, and the score of dangling nodes, which have no
+    out-links, is spread uniformly over all nodes. The graph is not modified.
+
     Arguments:
-        G : graph to compute PageRank on
+        G : graph to compute PageRank on (Networkx graph object or SignedGraph)
         signed : Consider a signed network. Default: True
         symmetric : Consider a symmetric network. Default: False
         alpha : teleportation parameter for PageRank to cover for dangling edges.
@@ -14,36 +83,31 @@ def pagerank(G, signed=True, symmetric=False, alpha=0.8, max_iter=100):
         max_iter : maximum number of iterations to perform the power iteration to obtain
                    an approximation of the steady state vector
                    Default: 100
+        tol : the iteration stops when the L1 change of the scores is below n * tol.
+              Default: 1e-6
+        diagnostics : Argument to toggle to get information about the iteration.
+                      Default: False
 
     Returns:
-        A dictionary with keys as nodes and values as PageRank values
+        A dictionary with keys as nodes and values as PageRank values. If diagnostics is True,
+        a 2-tuple : (dictionary, dict with the number of 'iterations', the last L1 'error'
+        and whether the iteration 'converged')
     """
-    from networkx import link_analysis
-
-    # By default, the graph is assumed to be signed and asymmetric
-    if not signed:
-        for u, v, d in G.edges(data=True):
-            G[u][v]['weight'] = abs(G[u][v]['weight'])
-    if symmetric:
-        nodes = list(G.nodes())
-        for i in range(len(nodes)):
-            for j in range(i, len(nodes)):
-                if G.has_edge(nodes[i], nodes[j]):
-                    if G.has_edge(nodes[j], nodes[i]):
-                        # This happens due to A + A.T
-                        G[nodes[i]][nodes[j]]['weight'] += G[nodes[j]][nodes[i]]['weight']
-                        G[nodes[j]][nodes[i]]['weight'] += G[nodes[i]][nodes[j]]['weight']
-                    else:
-                        G.add_edge(nodes[j], nodes[i], weight=G[nodes[i]][nodes[j]]['weight'])
-
-    return link_analysis.pagerank_scipy(G, alpha=alpha, max_iter=max_iter)
+    x, iterations, errors = _pagerank_group(get_matrix_bundle(G), symmetric,
+                                            [-1 if signed else 1], alpha, max_iter, tol)
+    n = x.shape[0]
+    scores = dict(zip(_node_names(G), x[:, 0].tolist()))
+    if not diagnostics:
+        return scores
+    return scores, {'iterations': int(iterations[0]), 'error': float(errors[0]),
+                    'converged': bool(errors[0] < n * tol)}
 
 
 def negativerank(G, beta, alpha=0.8, max_iter=100):
     """
     Function to get the Negative rank of a nodes in a graph.
     Negative rank is given by:
-        Signed Spectral Rank - eta * Page Rank
+        Signed Spectral Rank - beta * Page Rank
 
     Arguments:
         G : graph to compute PageRank and its variants on
@@ -57,38 +121,81 @@ def negativerank(G, beta, alpha=0.8, max_iter=100):
     Returns:
         A dictionary with keys as nodes and values as PageRank values
     """
-    # PageRank vals
-    PR = pagerank(G, alpha=alpha, max_iter=max_iter)
-    SR = pagerank(G, signed=True, alpha=alpha, max_iter=max_iter)
-    NR = {}
-    for key in SR.keys():
-        NR[key] = SR[key] - beta * PR[key]
-    return NR
+    # PageRank and Signed Spectral Rank vals, iterated together
+    x, _, _ = _pagerank_group(get_matrix_bundle(G), False, [1, -1], alpha, max_iter, 1e-6)
+    return dict(zip(_node_names(G), (x[:, 1] - beta * x[:, 0]).tolist()))
+
+
+def _exponential_iteration(adj_t, mus, max_iter, tol):
+    # Exponential Ranking iterations for each value of mu, as the columns of one matrix of
+    # trust vectors. exp(k / mu) is normalized after subtracting the maximum of k / mu, which
+    # leaves the normalized vector unchanged but cannot overflow.
+    n, m = adj_t.shape[0], len(mus)
+    p = np.full((n, m), 1.0 / n)
+    iterations, errors = np.zeros(m, dtype=int), np.full(m, np.inf)
+    active = np.ones(m, dtype=bool)
+    for i in range(max_iter):
+        z = adj_t.dot(p[:, active]) / mus[active]
+        p_new = np.exp(z - z.max(axis=0))
+        p_new /= p_new.sum(axis=0)
+        errors[active] = abs(p_new - p[:, active]).sum(axis=0)
+        iterations[active] = i + 1
+        p[:, active] = p_new
+        active &= errors >= tol
+        if not active.any():
+            break
+    return adj_t.dot(p), iterations, errors
 
 
-def exponentialrank(G, mu=0.2, max_iter=100):
+def exponentialrank(G, mu=0.2, max_iter=100, tol=1e-6, diagnostics=False):
     """
     Function to get the ranking of nodes in a graph by Exponential Ranking,
     proposed by Traag et al, "Exponential Ranking: taking into account negative links"
 
     Arguments:
-        G : graph to compute Exponential Rank
+        G : graph to compute Exponential Rank (Networkx graph object or SignedGraph)
         mu : mu parameter in the algorithm. Default: 0.2
         max_iter : maximum number of iterations to perform the power iteration to obtain
                    an approximation of the steady state vector
                    Default: 100
+        tol : the iteration stops when the L1 change of the trust vector is below tol.
+              Default: 1e-6
+        diagnostics : Argument to toggle to get information about the iteration.
+                      Default: False
 
     Returns:
-        A dictionary with keys as nodes and values as PageRank values
+        A dictionary with keys as nodes and values as PageRank values. If diagnostics is True,
+        a 2-tuple : (dictionary, dict with the number of 'iterations', the last L1 'error'
+        and whether the iteration 'converged')
     """
-    from numpy import full, exp
+    adj, _ = get_adjacency_matrix(G)
+    final_vals, iterations, errors = _exponential_iteration(adj.T.tocsr(), np.array([mu]),
+                                                            max_iter, tol)
+    scores = dict(zip(_node_names(G), final_vals[:, 0].tolist()))
+    if not diagnostics:
+        return scores
+    return scores, {'iterations': int(iterations[0]), 'error': float(errors[0]),
+                    'converged': bool(errors[0] < tol)}
+
 
+def exponentialrank_sweep(G, mus, max_iter=100, tol=1e-6):
+    """
+    Function to get the Exponential Ranking of the nodes of a graph for several values of
+    mu at once. The trust vectors of all the values are advanced together, with one sparse
+    matrix product per iteration, and each stops when its L1 change is below tol.
+
+    Arguments:
+        G : graph to compute Exponential Rank (Networkx graph object or SignedGraph)
+        mus : sequence of values of mu
+        max_iter : maximum number of iterations. Default: 100
+        tol : the iteration of a value stops when the L1 change of its trust vector is
+              below tol. Default: 1e-6
+
+    Returns:
+        A 2-tuple : (n x len(mus) array of values, whose rows follow the order of the nodes
+        of G, array of the number of iterations for each value of mu)
+    """
     adj, _ = get_adjacency_matrix(G)
-    adj = adj.T
-    p = full(adj.shape[0], 1 / adj.shape[0])
-    for i in range(max_iter):
-        k = adj.dot(p)
-        p = exp(k / mu)
-        p = p / p.sum()
-    final_vals = adj.dot(p)
-    return {i: final_vals[i] for i in range(0, adj.shape[0])}
+    mus = np.asarray(mus, dtype=np.float64)
+    final_vals, iterations, _ = _exponential_iteration(adj.T.tocsr(), mus, max_iter, tol)
+    return final_vals, iterations
@@ -10,12 +10,10 @@ def fans_minus_freaks(G):
     a negative weight.
 
     Args:
-        G : a signed social network graph
+        G : a signed social network graph (Networkx graph object or SignedGraph)
 
     Returns:
         A list containing the FMF score for each node of the graph
     """
-    adj_mat = get_adjacency_matrix(G).tocsr()
-    for i, j in zip(*adj_mat.nonzero()):
-        adj_mat[i, j] = 1 if adj_mat[i, j] > 0 else -1
-    return adj_mat.sum(axis=1)
+    adj_mat, _ = get_adjacency_matrix(G)
+    return adj_mat.sign().sum(axis=1)
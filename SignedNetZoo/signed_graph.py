@@ -0,0 +1,210 @@
+import numpy as np
+import networkx as nx
+import scipy.sparse as ssp
+
+
+class SignedGraph(object):
+    """
+    Class representing a directed signed graph in compressed sparse row (CSR) form, as a
+    compact alternative to `nx.DiGraph`. Nodes are the integers 0, ..., n - 1, and the
+    out-neighbours of node `i` are `indices[indptr[i]:indptr[i + 1]]`, sorted, with the
+    weights of the corresponding edges in `weights[indptr[i]:indptr[i + 1]]`.
+
+    All the functions in `graph_properties`, `node_ranking` and `link_prediction` accept a
+    `SignedGraph` wherever they accept a Networkx graph.
+
+    Arguments:
+        indptr : int32 array of length n + 1 with the offsets of each row
+        indices : int32 array with the target of each edge, sorted within each row
+        weights : int8 or float32 array with the weight of each edge
+        node_ids : Optional array of original node names, such that node_ids[i] is the name
+                   of node i. Default : None
+    """
+
+    __slots__ = ('indptr', 'indices', 'weights', 'node_ids', '_transpose', '__weakref__')
+
+    def __init__(self, indptr, indices, weights, node_ids=None):
+        self.indptr = np.asarray(indptr, dtype=np.int32)
+        self.indices = np.asarray(indices, dtype=np.int32)
+        self.weights = _compact_weights(weights)
+        self.node_ids = node_ids
+        self._transpose = None
+        assert len(self.indices) == len(self.weights) == self.indptr[-1], \
+            "inconsistent CSR arrays"
+        assert node_ids is None or len(node_ids) == len(self.indptr) - 1, \
+            "node_ids must have one entry per node"
+
+    @classmethod
+    def from_edges(cls, src, dst, weight, num_nodes=None, node_ids=None):
+        """
+        Build a graph from arrays of edges. If an edge appears more than once, the last
+        occurrence is kept, as when adding the edges to a `nx.DiGraph` in order.
+
+        Arguments:
+            src : array of source node indices
+            dst : array of target node indices
+            weight : array of edge weights
+            num_nodes : number of nodes. Default : None (one more than the largest index,
+                        or the length of `node_ids` if given)
+            node_ids : Optional array of original node names. Default : None
+        """
+        src = np.asarray(src, dtype=np.int64)
+        dst = np.asarray(dst, dtype=np.int64)
+        weight = np.asarray(weight)
+        if num_nodes is None:
+            if node_ids is not None:
+                num_nodes = len(node_ids)
+            else:
+                num_nodes = int(max(src.max(), dst.max())) + 1 if len(src) > 0 else 0
+
+        keys = src * num_nodes + dst
+        order = np.argsort(keys, kind='mergesort')
+        keys = keys[order]
+        last = np.ones(len(keys), dtype=bool)
+        last[:-1] = keys[1:] != keys[:-1]
+        order = order[last]
+
+        indptr = np.zeros(num_nodes + 1, dtype=np.int64)
+        np.cumsum(np.bincount(src[order], minlength=num_nodes), out=indptr[1:])
+        return cls(indptr, dst[order], weight[order], node_ids)
+
+    @classmethod
+    def from_networkx(cls, G, weight='weight'):
+        """
+        Build a graph from a Networkx graph. Nodes are numbered in the order of `G.nodes()`,
+        and their names are kept in `node_ids`. Undirected edges are added in both
+        directions.
+
+        Arguments:
+            G : Networkx graph
+            weight : edge attribute holding the weight, 1 if missing. Default : 'weight'
+        """
+        nodes = list(G.nodes())
+        index = {node: i for i, node in enumerate(nodes)}
+        edges = list(G.edges(data=weight, default=1))
+        src = np.array([index[u] for u, _, _ in edges], dtype=np.int64)
+        dst = np.array([index[v] for _, v, _ in edges], dtype=np.int64)
+        wgt = np.array([w for _, _, w in edges])
+        if not G.is_directed():
+            src, dst, wgt = np.concatenate([src, dst]), np.concatenate([dst, src]), \
+                np.concatenate([wgt, wgt])
+        node_ids = np.empty(len(nodes), dtype=object)
+        node_ids[:] = nodes
+        return cls.from_edges(src, dst, wgt, num_nodes=len(nodes), node_ids=node_ids)
+
+    def to_networkx(self):
+        """
+        Convert the graph to a `nx.DiGraph`, with nodes named by `node_ids` if present.
+        """
+        src, dst, weight = self.edges()
+        if self.node_ids is not None:
+            names = np.asarray(self.node_ids)
+            src, dst = names[src], names[dst]
+            nodes = names.tolist()
+        else:
+            nodes = range(self.number_of_nodes())
+        G = nx.DiGraph()
+        G.add_nodes_from(nodes)
+        G.add_weighted_edges_from(zip(src.tolist(), dst.tolist(), weight.tolist()))
+        return G
+
+    def to_scipy(self, dtype=None):
+        """
+        Get the n x n adjacency matrix as a `scipy.sparse.csr_matrix`.
+
+        Arguments:
+            dtype : dtype of the matrix. Default : None (int64 for integer weights, float64
+                    otherwise, as for `nx.adjacency_matrix`)
+        """
+        if dtype is None:
+            dtype = np.int64 if np.issubdtype(self.weights.dtype, np.integer) else np.float64
+        n = self.number_of_nodes()
+        return ssp.csr_matrix((self.weights.astype(dtype), self.indices, self.indptr),
+                              shape=(n, n))
+
+    def transpose(self):
+        """
+        Get the graph with all the edges reversed, whose CSR arrays are the CSC arrays of
+        this graph. The result is computed once and cached.
+        """
+        if self._transpose is None:
+            csc = ssp.csr_matrix((self.weights, self.indices, self.indptr),
+                                 shape=(self.number_of_nodes(),) * 2).tocsc()
+            csc.sort_indices()
+            self._transpose = SignedGraph(csc.indptr, csc.indices, csc.data, self.node_ids)
+        return self._transpose
+
+    @property
+    def T(self):
+        return self.transpose()
+
+    def is_directed(self):
+        return True
+
+    def number_of_nodes(self):
+        return len(self.indptr) - 1
+
+    def number_of_edges(self):
+        return len(self.indices)
+
+    def nodes(self):
+        return range(self.number_of_nodes())
+
+    def edges(self):
+        """
+        Get the edges as a 3-tuple of arrays (sources, targets, weights).
+        """
+        src = np.repeat(np.arange(self.number_of_nodes(), dtype=np.int32),
+                        np.diff(self.indptr))
+        return src, self.indices, self.weights
+
+    def out_degree(self):
+        return np.diff(self.indptr)
+
+    def in_degree(self):
+        return np.bincount(self.indices, minlength=self.number_of_nodes())
+
+    def edge_weights(self, src, dst, default=0):
+        """
+        Look up the weights of several edges at once.
+
+        Arguments:
+            src : array of source node indices
+            dst : array of target node indices
+            default : weight returned for the edges which do not exist. Default : 0
+
+        Returns:
+            array of weights, with `default` for missing edges
+        """
+        n = self.number_of_nodes()
+        query = np.asarray(src, dtype=np.int64) * n + np.asarray(dst, dtype=np.int64)
+        if self.number_of_edges() == 0:
+            return np.full(len(query), default)
+        edge_src, edge_dst, _ = self.edges()
+        keys = edge_src.astype(np.int64) * n + edge_dst
+        pos = np.minimum(np.searchsorted(keys, query), len(keys) - 1)
+        return np.where(keys[pos] == query, self.weights[pos], default)
+
+    def has_edge(self, u, v):
+        """
+        Check if the edge from `u` to `v` exists.
+        """
+        row = self.indices[self.indptr[u]: self.indptr[u + 1]]
+        pos = np.searchsorted(row, v)
+        return pos < len(row) and row[pos] == v
+
+    def __len__(self):
+        return self.number_of_nodes()
+
+    def __repr__(self):
+        return "SignedGraph(nodes={}, edges={})".format(self.number_of_nodes(),
+                                                        self.number_of_edges())
+
+
+def _compact_weights(weights):
+    # Store integer weights as int8 when they fit, and any other weights as float32.
+    weights = np.asarray(weights)
+    if np.issubdtype(weights.dtype, np.integer) or weights.dtype == bool:
+        if len(weights) == 0 or (weights.min() >= -128 and weights.max() <= 127):
+            return weights.astype(np.int8)
+    return weights.astype(np.float32)
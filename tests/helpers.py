@@ -0,0 +1,32 @@
+"""
+Random signed graphs shared by the tests.
+"""
+import numpy as np
+import networkx as nx
+
+
+def sign_edges(G, seed, weights=(-1, 1)):
+    """
+    Give each edge of G a weight drawn uniformly from `weights`, in place.
+
+    Arguments:
+        G : Networkx graph
+        seed : seed of the random weights
+        weights : possible weights. Default: (-1, 1)
+
+    Returns:
+        G
+    """
+    rng = np.random.RandomState(seed)
+    for u, v in G.edges():
+        G[u][v]['weight'] = int(rng.choice(weights))
+    return G
+
+
+def random_signed_graph(n, k, seed, weights=(-1, 1)):
+    """
+    Random directed graph in which each node has `k` out-neighbours, without self-loops,
+    and whose edges are weighted by `sign_edges`.
+    """
+    G = nx.directed.random_uniform_k_out_graph(n, k, self_loops=False, seed=seed)
+    return sign_edges(nx.DiGraph(G), seed, weights)
@@ -1,11 +1,25 @@
 """
 Smoke test for datasets in SignedNetZoo. Only testing on small datasets.
 """
+import os
+import io
+import gzip
+import hashlib
+import tarfile
+import threading
 import SignedNetZoo
 import shutil
 import unittest
+import tempfile
+import numpy as np
+import pandas as pd
 import networkx as nx
 
+try:
+    from http.server import HTTPServer, BaseHTTPRequestHandler
+except ImportError:
+    from BaseHTTPServer import HTTPServer, BaseHTTPRequestHandler
+
 
 class TestDataset(unittest.TestCase):
 
@@ -52,5 +66,340 @@ class TestDataset(unittest.TestCase):
         self._test_dataset(self, 'WikiSigned')
 
 
+class TestProcessedFormat(unittest.TestCase):
+    """
+    Tests on the processed format, using a small raw file placed where the download would be.
+    """
+
+    edges = [(10, 20, 1), (20, 30, -1), (30, 10, 1), (40, 10, -1), (20, 40, 1), (10, 40, 1)]
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        raw_path = os.path.join(self.root, SignedNetZoo.datasets.Epinions.raw)
+        os.makedirs(raw_path)
+        raw_file = os.path.join(raw_path,
+                                os.path.basename(SignedNetZoo.datasets.Epinions.url))
+        with gzip.open(raw_file, 'wt') as f:
+            f.write('# header\n# header\n# header\n# FromNodeId\tToNodeId\tSign\n')
+            for edge in self.edges:
+                f.write('{}\t{}\t{}\n'.format(*edge))
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def test_edge_arrays(self):
+        dataset = SignedNetZoo.datasets.Epinions(root=self.root)
+        arrays = dataset.edges
+        self.assertEqual(arrays['src'].dtype, np.int32)
+        self.assertEqual(arrays['dst'].dtype, np.int32)
+        self.assertEqual(arrays['weight'].dtype, np.int8)
+        self.assertIsInstance(arrays['src'], np.memmap)
+        node_ids = arrays['node_ids']
+        recovered = set(zip(node_ids[arrays['src']].tolist(), node_ids[arrays['dst']].tolist(),
+                            arrays['weight'].tolist()))
+        self.assertEqual(recovered, set(self.edges))
+
+    def test_graph(self):
+        dataset = SignedNetZoo.datasets.Epinions(root=self.root)
+        G = dataset.graph
+        self.assertIsInstance(G, nx.DiGraph)
+        self.assertEqual(G.number_of_nodes(), 4)
+        self.assertEqual(G.number_of_edges(), len(self.edges))
+
+        dataset = SignedNetZoo.datasets.Epinions(root=self.root, split=0.5)
+        G_train, G_test = dataset.graph
+        self.assertEqual(G_train.number_of_edges() + G_test.number_of_edges(), len(self.edges))
+        self.assertEqual(G_train.number_of_nodes(), 4)
+        self.assertEqual(G_test.number_of_nodes(), 4)
+
+    def test_prepare_datasets(self):
+        timings = SignedNetZoo.datasets.prepare_datasets(['Epinions'], root=self.root,
+                                                         processes=2)
+        self.assertEqual(set(timings['Epinions'].keys()),
+                         {'lock', 'download', 'preprocess', 'total'})
+        dataset = SignedNetZoo.datasets.Epinions(root=self.root)
+        self.assertEqual(dataset.graph.number_of_edges(), len(self.edges))
+
+    def test_splits(self):
+        num_edges = len(self.edges)
+        masks = []
+        for split, seed in [(0.5, 0), (0.5, 1), (0.7, 0)]:
+            dataset = SignedNetZoo.datasets.Epinions(root=self.root, split=split, seed=seed)
+            mask = dataset.split_mask()
+            self.assertEqual(mask.sum(), int(split * num_edges))
+            train, test = dataset.edges
+            self.assertEqual(len(train['src']), mask.sum())
+            self.assertEqual(len(test['src']), num_edges - mask.sum())
+            masks.append(mask)
+        self.assertTrue((masks[0] == SignedNetZoo.datasets.Epinions(
+            root=self.root, split=0.5, seed=0).split_mask()).all())
+
+        test_masks = []
+        for fold in range(3):
+            dataset = SignedNetZoo.datasets.Epinions(root=self.root, folds=3, fold=fold)
+            test_masks.append(~dataset.split_mask())
+            G_train, G_test = dataset.graph
+            self.assertEqual(G_test.number_of_edges(), num_edges // 3)
+            self.assertEqual(G_train.number_of_edges() + G_test.number_of_edges(), num_edges)
+        self.assertTrue((np.sum(test_masks, axis=0) == 1).all())
+
+    def test_graph_cache(self):
+        dataset = SignedNetZoo.datasets.Epinions(root=self.root)
+        G = dataset.graph
+        self.assertIs(dataset.graph, G)
+        self.assertIs(SignedNetZoo.datasets.Epinions(root=self.root).graph, G)
+
+        dataset.release()
+        self.assertIsNot(dataset.graph, G)
+
+        SignedNetZoo.datasets.set_graph_cache_size(0)
+        try:
+            self.assertIsNot(dataset.graph, dataset.graph)
+        finally:
+            SignedNetZoo.datasets.set_graph_cache_size(4)
+
+
+class RangeRequestHandler(BaseHTTPRequestHandler):
+    # Serves `files` from memory, honouring single 'bytes=<start>-' Range headers, and
+    # without Content-Length headers if `send_length` is False.
+    files = {}
+    ranges = []
+    send_length = True
+
+    def do_GET(self):
+        data = self.files[self.path]
+        start = 0
+        range_header = self.headers.get('Range')
+        self.ranges.append(range_header)
+        if range_header is not None:
+            start = int(range_header[len('bytes='):-1])
+            if start >= len(data):
+                self.send_response(416)
+                self.end_headers()
+                return
+            self.send_response(206)
+        else:
+            self.send_response(200)
+        if self.send_length:
+            self.send_header('Content-Length', str(len(data) - start))
+        self.end_headers()
+        self.wfile.write(data[start:])
+
+    def log_message(self, *args):
+        pass
+
+
+class TestDownload(unittest.TestCase):
+
+    data = bytes(bytearray(range(256))) * 1000
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        RangeRequestHandler.files = {'/a.bin': self.data, '/b.bin': self.data[::-1]}
+        RangeRequestHandler.ranges = []
+        RangeRequestHandler.send_length = True
+        self.server = HTTPServer(('127.0.0.1', 0), RangeRequestHandler)
+        self.url = 'http://127.0.0.1:{}/'.format(self.server.server_address[1])
+        self.thread = threading.Thread(target=self.server.serve_forever)
+        self.thread.start()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.thread.join()
+        self.server.server_close()
+        shutil.rmtree(self.root)
+
+    def _read(self, name):
+        with open(os.path.join(self.root, name), 'rb') as f:
+            return f.read()
+
+    def test_download_and_resume(self):
+        from SignedNetZoo.datasets.utils import download_file
+        sha256 = hashlib.sha256(self.data).hexdigest()
+
+        with open(os.path.join(self.root, 'a.bin.part'), 'wb') as f:
+            f.write(self.data[:1000])
+        download_file(self.root, self.url + 'a.bin', sha256=sha256)
+        self.assertEqual(self._read('a.bin'), self.data)
+        self.assertEqual(RangeRequestHandler.ranges, ['bytes=1000-'])
+        self.assertFalse(os.path.exists(os.path.join(self.root, 'a.bin.part')))
+
+        # Complete files are not downloaded again.
+        download_file(self.root, self.url + 'a.bin', sha256=sha256)
+        self.assertEqual(len(RangeRequestHandler.ranges), 1)
+
+    def test_checksum_mismatch(self):
+        from SignedNetZoo.datasets.utils import download_file
+        with self.assertRaises(IOError):
+            download_file(self.root, self.url + 'b.bin', sha256='0' * 64)
+        self.assertEqual(os.listdir(self.root), ['b.bin.lock'])
+
+    def test_truncated_archive(self):
+        from SignedNetZoo.datasets.utils import download_file
+        compressed = gzip.compress(self.data)
+        RangeRequestHandler.files['/c.bin.gz'] = compressed[:len(compressed) // 2]
+        RangeRequestHandler.send_length = False
+        with self.assertRaises(IOError):
+            download_file(self.root, self.url + 'c.bin.gz')
+        self.assertFalse(os.path.exists(os.path.join(self.root, 'c.bin.gz')))
+
+        RangeRequestHandler.files['/c.bin.gz'] = compressed
+        download_file(self.root, self.url + 'c.bin.gz')
+        self.assertEqual(self._read('c.bin.gz'), compressed)
+
+    def test_corrupt_archive(self):
+        from SignedNetZoo.datasets.utils import download_file
+        compressed = gzip.compress(self.data)
+        corrupt = compressed[:-8] + b'\0' * 8
+        RangeRequestHandler.files['/d.bin.gz'] = corrupt
+        with self.assertRaises(IOError):
+            download_file(self.root, self.url + 'd.bin.gz')
+        self.assertEqual(os.listdir(self.root), ['d.bin.gz.lock'])
+
+        RangeRequestHandler.files['/d.bin.gz'] = compressed
+        download_file(self.root, self.url + 'd.bin.gz')
+        self.assertEqual(self._read('d.bin.gz'), compressed)
+        self.assertEqual(RangeRequestHandler.ranges, [None, None])
+
+    def test_download_files(self):
+        from SignedNetZoo.datasets.utils import download_files
+        download_files([(self.root, self.url + 'a.bin'),
+                        (self.root, self.url + 'b.bin',
+                         hashlib.sha256(self.data[::-1]).hexdigest())])
+        self.assertEqual(self._read('a.bin'), self.data)
+        self.assertEqual(self._read('b.bin'), self.data[::-1])
+
+
+class TestArchiveStreaming(unittest.TestCase):
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def test_slashdotzoo(self):
+        raw_path = os.path.join(self.root, SignedNetZoo.datasets.SlashdotZoo.raw)
+        os.makedirs(raw_path)
+        raw_file = os.path.join(raw_path,
+                                os.path.basename(SignedNetZoo.datasets.SlashdotZoo.url))
+        members = [('slashdot-zoo/README', b'readme'),
+                   ('slashdot-zoo/out.matrix', b'% asym signed\n% 3 3 3\n1 2 1\n2 3 -1\n3 1 1\n')]
+        with tarfile.open(raw_file, 'w:bz2') as archive:
+            for name, data in members:
+                info = tarfile.TarInfo(name)
+                info.size = len(data)
+                archive.addfile(info, io.BytesIO(data))
+
+        dataset = SignedNetZoo.datasets.SlashdotZoo(root=self.root)
+        self.assertEqual(sorted(dataset.graph.edges(data='weight')),
+                         [(0, 1, 1), (1, 2, -1), (2, 0, 1)])
+        self.assertEqual(sorted(os.listdir(raw_path)),
+                         [os.path.basename(raw_file), os.path.basename(raw_file) + '.lock'])
+
+
+class TestBitcoinTemporal(unittest.TestCase):
+
+    # SOURCE, TARGET, RATING, TIME, in no particular time order.
+    edges = [(1, 2, 4, 50.), (2, 3, -2, 10.), (3, 1, 10, 30.), (1, 3, -10, 20.),
+             (2, 1, 1, 40.), (3, 2, 5, 60.), (1, 2, 3, 70.)]
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        raw_path = os.path.join(self.root, SignedNetZoo.datasets.Bitcoin.raw)
+        os.makedirs(raw_path)
+        raw_file = os.path.join(raw_path, os.path.basename(SignedNetZoo.datasets.Bitcoin.url))
+        with gzip.open(raw_file, 'wt') as f:
+            for edge in self.edges:
+                f.write('{},{},{},{}\n'.format(*edge))
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def test_edge_stream(self):
+        dataset = SignedNetZoo.datasets.Bitcoin(root=self.root)
+        batches = list(dataset.edge_stream(batch_size=3))
+        self.assertEqual([len(batch['time']) for batch in batches], [3, 3, 1])
+        time = np.concatenate([batch['time'] for batch in batches])
+        self.assertEqual(time.tolist(), sorted(edge[3] for edge in self.edges))
+
+    def test_temporal_split(self):
+        dataset = SignedNetZoo.datasets.Bitcoin(root=self.root, split=0.5, temporal=True)
+        train, test = dataset.edges
+        self.assertEqual(train['time'].tolist(), [10., 20., 30.])
+        self.assertEqual(test['time'].tolist(), [40., 50., 60., 70.])
+
+    def test_snapshots(self):
+        dataset = SignedNetZoo.datasets.Bitcoin(root=self.root)
+        node_ids = dataset.edges['node_ids']
+        windows = list(dataset.snapshots(window=30., step=20.))
+        self.assertEqual([t for t, _ in windows], [10., 30., 50., 70.])
+        self.assertEqual(windows[1][1]['time'].tolist(), [30., 40., 50.])
+
+        for (t, arrays), (t_graph, G) in zip(windows, dataset.snapshots(30., 20., graph=True)):
+            self.assertEqual(t, t_graph)
+            expected = {(node_ids[u], node_ids[v]): w
+                        for (u, v, w) in zip(arrays['src'], arrays['dst'], arrays['weight'])}
+            actual = {(node_ids[u], node_ids[v]): w for (u, v, w) in G.edges(data='weight')}
+            self.assertEqual(actual, expected)
+
+
+class TestCanonicalizeNodes(unittest.TestCase):
+
+    def test_canonicalize_nodes(self):
+        from SignedNetZoo.datasets.utils import canonicalize_nodes
+        src, dst, node_ids = canonicalize_nodes(np.array(['c', 'a', 'b']),
+                                                np.array(['a', 'd', 'c']))
+        self.assertEqual(src.dtype, np.int32)
+        self.assertEqual(dst.dtype, np.int32)
+        self.assertEqual(node_ids.tolist(), ['a', 'b', 'c', 'd'])
+        self.assertEqual(src.tolist(), [2, 0, 1])
+        self.assertEqual(dst.tolist(), [0, 3, 2])
+
+
+class TestTwitterMentions(unittest.TestCase):
+
+    def test_get_mention_edges(self):
+        from SignedNetZoo.datasets.Twitter import get_mention_edges
+        rows = [(4, 'a', '@b hello'), (0, 'a', 'hi @b'), (4, 'a', '@b again'),
+                (0, 'b', '@c you'), (0, 'b', '@c again'), (2, 'b', '@c neutral'),
+                (4, 'c', '@a and @b'), (0, 'c', 'no mentions @ all'), (4, 'c', 'a@b @a:'),
+                (4, 'd', '@e'), (0, 'd', '@e')]
+        df = pd.DataFrame(rows)
+        edges = zip(*get_mention_edges(df[1], df[2], df[0]))
+        self.assertEqual(sorted(edges), [('a', 'b', 1), ('b', 'c', -1), ('c', 'a:', 1)])
+
+    def test_chunked_mention_edges(self):
+        # edges merged across chunks, some of which have no mentions at all
+        from SignedNetZoo.datasets.Twitter import _single_mentions, merge_mention_edges
+        from SignedNetZoo.datasets.utils import read_table_chunked
+        rows = ['4,a,@b hello', '0,b,no mentions', '2,b,@c neutral', '0,a,hi @b',
+                '4,a,@b again', '0,b,@c you', '4,c,@a and @b']
+        chunks = []
+
+        def convert(chunk):
+            chunks.append(len(chunk))
+            return _single_mentions(chunk[1], chunk[2], chunk[0])
+
+        edges = read_table_chunked(io.StringIO('\n'.join(rows)), convert, chunksize=2,
+                                   header=None)
+        self.assertEqual(chunks, [2, 2, 2, 1])
+        self.assertEqual(sorted(zip(*merge_mention_edges(*edges))),
+                         [('a', 'b', 1), ('b', 'c', -1)])
+
+
+class TestWikipediaVotes(unittest.TestCase):
+
+    def test_read_votes(self):
+        from SignedNetZoo.datasets.Wikipedia import read_votes
+        lines = ['SRC:A\n', 'TGT:B\n', 'VOT:1\n', 'RES:1\n', 'YEA:2013\n', 'DAT:\n',
+                 'TXT:SRC:C\n', '\n', 'SRC:\n', 'TGT:B\n', 'VOT:-1\n', 'RES:1\n',
+                 'YEA:2013\n', 'DAT:\n', 'TXT:\n']
+        src, tgt, vot = read_votes(lines)
+        self.assertEqual(src.tolist(), ['A', ''])
+        self.assertEqual(tgt.tolist(), ['B', 'B'])
+        self.assertEqual(vot.tolist(), [1, -1])
+
+
 if __name__ == '__main__':
     unittest.main()
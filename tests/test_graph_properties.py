@@ -3,8 +3,12 @@ Testing graph properties for graphs.
 """
 import SignedNetZoo
 import unittest
+import itertools
 import numpy as np
 import networkx as nx
+import scipy.sparse as ssp
+
+from helpers import sign_edges, random_signed_graph
 
 
 class TestGraphDefs(unittest.TestCase):
@@ -58,6 +62,66 @@ class TestGraphDefs(unittest.TestCase):
             self.assertEqual(mat.shape, (10, 10))
             self.assertTrue((np.diag(mat.diagonal()) == mat.todense()).all())
 
+    def test_matrix_bundle(self):
+        gp = SignedNetZoo.graph_properties
+        sg = SignedNetZoo.SignedGraph.from_networkx(self.G1)
+        bundle = gp.get_matrix_bundle(sg)
+        self.assertIs(gp.get_matrix_bundle(sg), bundle)
+        self.assertIs(gp.get_adjacency_matrix(sg)[0], bundle.A)
+        self.assertIs(gp.get_absolute_symmetric_adjacency_matrix(sg), bundle.abs_sym_A)
+        gp.clear_matrix_bundle(sg)
+        self.assertIsNot(gp.get_matrix_bundle(sg), bundle)
+
+        # networkx graphs can change in place, so their matrices are rebuilt
+        G = nx.DiGraph()
+        G.add_weighted_edges_from([(0, 1, 1), (1, 2, 1), (2, 0, 1)])
+        self.assertTrue(gp.is_balanced(G)[0])
+        G.remove_edge(2, 0)
+        G.add_edge(0, 2, weight=-1)
+        self.assertFalse(gp.is_balanced(G)[0])
+        G[0][2]['weight'] = 1
+        self.assertEqual(gp.get_adjacency_matrix(G)[0][0, 2], 1)
+
+    def test_laplacians(self):
+        gp = SignedNetZoo.graph_properties
+        G = nx.DiGraph()
+        G.add_weighted_edges_from([(0, 1, 1), (1, 2, -1), (2, 0, 1), (2, 3, -1)])
+        G.add_node(4)
+        B = gp.get_symmetric_adjacency_matrix(G).toarray()
+        E = np.diag(abs(B).sum(axis=1))
+        with np.errstate(divide='ignore'):
+            inv_sqrt = np.where(E.diagonal() > 0, 1 / np.sqrt(E.diagonal()), 0)
+        expected = {'signed': E - B,
+                    'normalized': np.diag(E.diagonal() > 0) - np.outer(inv_sqrt, inv_sqrt) * B,
+                    'opposing': np.diag(B.sum(axis=1)) - B}
+        funcs = {'signed': gp.get_signed_laplacian,
+                 'normalized': gp.get_normalized_signed_laplacian,
+                 'opposing': gp.get_opposing_laplacian}
+        x = np.random.RandomState(0).randn(5, 2)
+        for kind in expected:
+            self.assertTrue(np.allclose(funcs[kind](G).toarray(), expected[kind]))
+            op = gp.get_laplacian_operator(G, kind)
+            self.assertTrue(np.allclose(op.dot(x), expected[kind].dot(x)))
+            self.assertTrue(np.allclose(op.matvec(x[:, 0]), expected[kind].dot(x[:, 0])))
+        # the triangle 0-1-2 is unbalanced, so the signed Laplacian is positive definite on it
+        self.assertGreater(np.linalg.eigvalsh(expected['signed'][:4, :4]).min(), 0)
+
+    def test_summarize(self):
+        G = nx.DiGraph()
+        G.add_weighted_edges_from([(0, 1, 1), (1, 0, 1), (1, 2, -1), (2, 1, 1), (2, 0, -1),
+                                   (3, 3, 1)])
+        summary = SignedNetZoo.graph_properties.summarize(G)
+        metas = SignedNetZoo.graph_properties.get_adjacency_matrix(G, True)[1]
+        self.assertEqual((summary['edges'], summary['positive'], summary['negative']),
+                         (metas['links'], metas['positive'], metas['negative']))
+        self.assertEqual(summary['self_loops'], 1)
+        self.assertEqual(summary['out_degree'].tolist(), [1, 2, 2, 1])
+        self.assertEqual(summary['negative_in_degree'].tolist(), [1, 0, 1, 0])
+        self.assertEqual(summary['in_degree_distribution'].tolist(), [0, 2, 2])
+        self.assertEqual(summary['reciprocal_edges'], 4)
+        self.assertAlmostEqual(summary['reciprocity'], nx.reciprocity(G))
+        self.assertEqual(summary['reciprocal_sign_agreement'], 0.5)
+
 
 class TestClusteringCoeffs(unittest.TestCase):
 
@@ -74,6 +138,63 @@ class TestClusteringCoeffs(unittest.TestCase):
             self.assertTrue(abs(scc) <= cc)
             self.assertTrue(-1 <= rcc <= 1)
 
+    def test_triangle_counts(self):
+        G = random_signed_graph(30, 4, seed=1, weights=(-2, -1, 1))
+        A = nx.to_numpy_array(G)
+        expected = {'triangles': (abs(A) * abs(A).dot(abs(A))).sum(),
+                    'signed_triangles': (A * A.dot(A)).sum(),
+                    'wedges': abs(A).dot(abs(A)).sum()}
+        for block_wedges, processes in [(None, 1), (10, 1), (50, 2)]:
+            counts = SignedNetZoo.graph_properties.triangle_counts(G, block_wedges, processes)
+            for key in expected:
+                self.assertAlmostEqual(counts[key], expected[key])
+
+    def test_local_clustering_coeffs(self):
+        cc = SignedNetZoo.graph_properties.clustering_coeffs
+        G = nx.DiGraph()
+        G.add_weighted_edges_from([(0, 1, 1), (1, 2, -1), (0, 2, 1), (2, 3, 1), (3, 0, 1)])
+        local_cc, local_scc, local_rcc = cc.local_clustering_coeffs(G, block_wedges=1)
+        # wedges 0 -> 1 -> 2 (closed, negative) and 0 -> 2 -> 3 (open) start at node 0
+        self.assertEqual(local_cc.tolist(), [0.5, 0, 0, 0])
+        self.assertEqual(local_scc.tolist(), [-0.5, 0, 0, 0])
+        self.assertEqual(local_rcc.tolist(), [-1, 0, 0, 0])
+        self.assertEqual(cc.local_clustering_coeff(G).tolist(), local_cc.tolist())
+        self.assertEqual(cc.local_sign_clustering_coeff(G).tolist(), local_scc.tolist())
+        self.assertEqual(cc.local_relative_sign_clustering_coeff(G).tolist(), local_rcc.tolist())
+
+    def test_approx_clustering_coeffs(self):
+        cc = SignedNetZoo.graph_properties.clustering_coeffs
+        G = random_signed_graph(30, 6, seed=2, weights=(-1, 1, 2))
+        for exact, approx in [(cc.clustering_coeff, cc.approx_clustering_coeff),
+                              (cc.sign_clustering_coeff, cc.approx_sign_clustering_coeff)]:
+            estimate, std_err = approx(G, samples=200000, seed=0)
+            self.assertLess(abs(estimate - exact(G)), 4 * std_err)
+            estimate, std_err = approx(G, half_width=0.05, batch_size=1000, seed=0)
+            self.assertLessEqual(1.96 * std_err, 0.05)
+            self.assertLess(abs(estimate - exact(G)), 4 * std_err)
+
+
+class TestTriadCensus(unittest.TestCase):
+
+    def test_triad_census(self):
+        G = sign_edges(nx.gnp_random_graph(12, 0.4, seed=0, directed=True), seed=0)
+        W = nx.to_numpy_array(G)
+        expected = np.zeros((16, 2), dtype=int)
+        for a, b, x in itertools.permutations(range(12), 3):
+            for dir_ax, w_ax in [(0, W[a, x]), (1, W[x, a])]:
+                for dir_xb, w_xb in [(0, W[x, b]), (1, W[b, x])]:
+                    if W[a, b] and w_ax and w_xb:
+                        expected[8 * dir_ax + 4 * (w_ax < 0) + 2 * dir_xb + (w_xb < 0),
+                                 int(W[a, b] < 0)] += 1
+
+        for block_wedges, processes in [(None, 1), (5, 1), (20, 2)]:
+            counts, shuffled = SignedNetZoo.graph_properties.triad_census(G, block_wedges,
+                                                                          processes)
+            self.assertEqual(counts.tolist(), expected.tolist())
+        # shuffling signs keeps the number of triads of each direction pattern
+        self.assertTrue(np.allclose(shuffled.reshape(2, 2, 2, 2, 2).sum(axis=(1, 3, 4)),
+                                    counts.reshape(2, 2, 2, 2, 2).sum(axis=(1, 3, 4))))
+
 
 class TestBalanced(unittest.TestCase):
 
@@ -123,6 +244,143 @@ class TestBalanced(unittest.TestCase):
             result = SignedNetZoo.graph_properties.is_balanced(graph, True)
             self.assertEqual(result, results_undir[i])
 
+    def test_is_balanced_reciprocal_edges(self):
+        gp = SignedNetZoo.graph_properties
+        G = nx.DiGraph()
+        G.add_weighted_edges_from([(2, 0, 1), (0, 1, 1), (1, 0, 1), (1, 3, -1)])
+        balanced, metas = gp.is_balanced(G, True)
+        self.assertTrue(balanced)
+        self.assertEqual(metas['original_sets'], [[2, 0, 1], [3]])
+
+        # both edges of a reciprocal pair count, so opposite signs are a conflict
+        G.add_edge(3, 1, weight=1)
+        self.assertEqual(gp.is_balanced(G, True), (False, None))
+
+    def test_is_balanced_factions(self):
+        G = nx.DiGraph(nx.directed.random_uniform_k_out_graph(200, 5, self_loops=False, seed=0))
+        faction = {u: u % 2 for u in G.nodes()}
+        for u, v in G.edges():
+            G[u][v]['weight'] = 1 if faction[u] == faction[v] else -1
+        balanced, metas = SignedNetZoo.graph_properties.is_balanced(G, True)
+        self.assertTrue(balanced)
+        self.assertEqual(metas['strength'], 'strong')
+        self.assertEqual(metas['possible_split'],
+                         {frozenset(range(0, 200, 2)), frozenset(range(1, 200, 2))})
+
+        G[0][next(iter(G[0]))]['weight'] *= -1
+        self.assertEqual(SignedNetZoo.graph_properties.is_balanced(G, True), (False, None))
+
+    def test_balance_tracker(self):
+        gp = SignedNetZoo.graph_properties
+        tracker = gp.BalanceTracker()
+        graph = nx.Graph()
+        edges = [('A', 'B', 1), ('A', 'C', 1), ('A', 'E', -1), ('A', 'D', -1), ('D', 'E', 1),
+                 ('F', 'G', 1), ('C', 'E', -1)]
+        for u, v, weight in edges:
+            graph.add_edge(u, v, weight=weight)
+            self.assertTrue(tracker.add_edge(u, v, weight))
+        self.assertEqual(tracker.possible_split(),
+                         gp.is_balanced(graph, True)[1]['possible_split'])
+
+        self.assertFalse(tracker.add_edges([('G', 'A', -1), ('B', 'D', 1), ('C', 'D', 1)]))
+        self.assertEqual(tracker.conflict, ('B', 'D', 1))
+        self.assertIsNone(tracker.possible_split())
+        self.assertEqual(tracker.num_edges, 10)
+
+    def test_frustration_index(self):
+        gp = SignedNetZoo.graph_properties
+        frustration, split, conflicts = gp.frustration_index(self.balanced_strong_dir, seed=0)
+        self.assertEqual((frustration, conflicts), (0, []))
+        self.assertEqual(split, {frozenset({'E', 'D'}), frozenset({'A', 'B', 'C'})})
+
+        G = sign_edges(nx.gnm_random_graph(12, 25, seed=0), seed=0)
+        A = nx.to_numpy_array(G)
+        # exact frustration index by enumerating all the splits
+        spins = np.array(list(itertools.product([-1, 1], repeat=12)))
+        expected = ((spins[:, :, None] * spins[:, None, :] * A) < 0).sum(axis=(1, 2)).min() // 2
+        for processes in [1, 2]:
+            frustration, split, conflicts = gp.frustration_index(G, restarts=4,
+                                                                 processes=processes, seed=0)
+            self.assertEqual(frustration, expected)
+            self.assertEqual(len(conflicts), expected)
+            for u, v in conflicts:
+                same_side = any(u in side and v in side for side in split)
+                self.assertEqual(G[u][v]['weight'] < 0, same_side)
+
+    def test_frustration_index_rounds(self):
+        # the nodes flipped in one round are independent, so each round reduces the
+        # frustration, also when the last nodes are isolated
+        round_flips = SignedNetZoo.graph_properties.balance._round_flips
+        G = sign_edges(nx.gnm_random_graph(30, 120, seed=1), seed=1)
+        # a negative triangle whose last node has the largest index with neighbours
+        G.add_weighted_edges_from([(30, 31, -1), (30, 32, -1), (31, 32, -1)])
+        G.add_nodes_from([33, 34])
+        sym_signs = ssp.csr_matrix(nx.to_numpy_array(G).astype(np.int64))
+        edges = sym_signs.tocoo()
+
+        def frustration(spins):
+            return (edges.data * spins[edges.row] * spins[edges.col] < 0).sum()
+
+        has_neighbours = np.diff(sym_signs.indptr) > 0
+        rng = np.random.RandomState(1)
+        for _ in range(50):
+            spins = rng.choice([-1, 1], 35)
+            spins[30:33] = 1
+            while True:
+                flips = round_flips(spins, sym_signs, has_neighbours, rng)
+                if flips is None:
+                    break
+                self.assertEqual(sym_signs[flips][:, flips].nnz, 0)
+                before = frustration(spins)
+                spins[flips] *= -1
+                self.assertLess(frustration(spins), before)
+
+
+class TestSpectral(unittest.TestCase):
+
+    def setUp(self):
+        self.G = nx.DiGraph(nx.directed.random_uniform_k_out_graph(300, 4, self_loops=False,
+                                                                   seed=0))
+        for u, v in self.G.edges():
+            self.G[u][v]['weight'] = 1 if u % 2 == v % 2 else -1
+        # the same graph with 10% of the signs flipped
+        self.unbalanced = self.G.copy()
+        rng = np.random.RandomState(0)
+        for u, v in self.unbalanced.edges():
+            self.unbalanced[u][v]['weight'] *= int(rng.choice([-1, 1], p=[0.1, 0.9]))
+
+    def test_algebraic_conflict(self):
+        gp = SignedNetZoo.graph_properties
+        self.assertAlmostEqual(gp.algebraic_conflict(self.G, seed=0)[0], 0, places=5)
+
+        G = self.unbalanced
+        expected = np.linalg.eigvalsh(gp.get_signed_laplacian(G).toarray())[:3]
+        vals, vecs = gp.algebraic_conflict(G, k=3, seed=0, return_vectors=True)
+        self.assertTrue(np.allclose(vals, expected, atol=1e-4))
+        self.assertEqual(vecs.shape, (300, 3))
+
+    def test_algebraic_conflict_self_loop(self):
+        # a node whose only edge is a positive self-loop has a zero Laplacian row
+        gp = SignedNetZoo.graph_properties
+        G = self.unbalanced
+        G.add_edge(300, 300, weight=1)
+        expected = np.linalg.eigvalsh(gp.get_signed_laplacian(G).toarray())[:2]
+        self.assertTrue(np.allclose(gp.algebraic_conflict(G, k=2, seed=0), expected, atol=1e-4))
+        frustration, _, _ = gp.frustration_index(G, restarts=0, seed=0)
+        self.assertGreater(frustration, 0)
+
+    def test_walk_balance(self):
+        gp = SignedNetZoo.graph_properties
+        ratio, std_err = gp.walk_balance(self.G, beta=0.5, seed=0)
+        self.assertLess(abs(ratio - 1), 4 * std_err)
+
+        G = nx.DiGraph()
+        G.add_weighted_edges_from([(0, 1, 1), (1, 2, 1), (2, 0, -1), (2, 3, 1)])
+        B = gp.get_symmetric_adjacency_matrix(G).toarray()
+        expected = np.exp(np.linalg.eigvalsh(B)).sum() / np.exp(np.linalg.eigvalsh(abs(B))).sum()
+        ratio, std_err = gp.walk_balance(G, num_probes=2000, seed=0)
+        self.assertLess(abs(ratio - expected), 4 * std_err)
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,107 @@
+"""
+Testing node ranking for graphs.
+"""
+import SignedNetZoo
+import unittest
+import numpy as np
+import networkx as nx
+
+from helpers import sign_edges
+
+
+class TestPageRank(unittest.TestCase):
+
+    def setUp(self):
+        self.G = sign_edges(nx.gnp_random_graph(40, 0.1, seed=0, directed=True), seed=0,
+                            weights=(-1, 1, 2))
+        self.abs_G = self.G.copy()
+        for u, v in self.abs_G.edges():
+            self.abs_G[u][v]['weight'] = abs(self.G[u][v]['weight'])
+
+    def test_pagerank(self):
+        weights = list(self.G.edges(data='weight'))
+        scores, info = SignedNetZoo.node_ranking.pagerank(self.G, signed=False, diagnostics=True)
+        expected = nx.pagerank(self.abs_G, alpha=0.8)
+        for node in expected:
+            self.assertAlmostEqual(scores[node], expected[node], places=5)
+        self.assertTrue(info['converged'])
+        self.assertLess(info['iterations'], 100)
+        self.assertEqual(list(self.G.edges(data='weight')), weights)
+
+        sym_G = nx.DiGraph()
+        sym_G.add_nodes_from(self.G)
+        for u, v, weight in self.abs_G.edges(data='weight'):
+            for s, t in [(u, v), (v, u)]:
+                old = sym_G[s][t]['weight'] if sym_G.has_edge(s, t) else 0
+                sym_G.add_edge(s, t, weight=old + weight)
+        scores = SignedNetZoo.node_ranking.pagerank(self.G, signed=False, symmetric=True)
+        expected = nx.pagerank(sym_G, alpha=0.8)
+        for node in expected:
+            self.assertAlmostEqual(scores[node], expected[node], places=5)
+
+        _, info = SignedNetZoo.node_ranking.pagerank(self.G, max_iter=2, diagnostics=True)
+        self.assertEqual(info['iterations'], 2)
+        self.assertFalse(info['converged'])
+
+    def test_negativerank(self):
+        PR = SignedNetZoo.node_ranking.pagerank(self.G, signed=False)
+        SR = SignedNetZoo.node_ranking.pagerank(self.G, signed=True)
+        NR = SignedNetZoo.node_ranking.negativerank(self.G, 0.5)
+        for node in NR:
+            self.assertAlmostEqual(NR[node], SR[node] - 0.5 * PR[node])
+
+
+class TestExponentialRank(unittest.TestCase):
+
+    def setUp(self):
+        self.G = sign_edges(nx.gnp_random_graph(40, 0.2, seed=1, directed=True), seed=1)
+
+    def test_exponentialrank(self):
+        # the unstabilized iteration, for a mu at which it does not overflow
+        adj = nx.to_numpy_array(self.G).T
+        p = np.full(40, 1 / 40.0)
+        for i in range(100):
+            p = np.exp(adj.dot(p) / 0.2)
+            p = p / p.sum()
+        scores, info = SignedNetZoo.node_ranking.exponentialrank(self.G, tol=1e-12,
+                                                                 diagnostics=True)
+        self.assertTrue(np.allclose([scores[i] for i in range(40)], adj.dot(p)))
+        self.assertTrue(info['converged'])
+
+        scores = SignedNetZoo.node_ranking.exponentialrank(self.G, mu=1e-4)
+        self.assertTrue(np.isfinite(list(scores.values())).all())
+
+    def test_exponentialrank_sweep(self):
+        mus = [0.05, 0.2, 1.0]
+        vals, iterations = SignedNetZoo.node_ranking.exponentialrank_sweep(self.G, mus)
+        self.assertEqual(vals.shape, (40, 3))
+        for j, mu in enumerate(mus):
+            scores, info = SignedNetZoo.node_ranking.exponentialrank(self.G, mu=mu,
+                                                                     diagnostics=True)
+            self.assertTrue(np.allclose(vals[:, j], [scores[i] for i in range(40)]))
+            self.assertEqual(iterations[j], info['iterations'])
+
+
+class TestRankNodes(unittest.TestCase):
+
+    def test_rank_nodes(self):
+        G = sign_edges(nx.gnp_random_graph(30, 0.15, seed=2, directed=True), seed=2)
+        nr = SignedNetZoo.node_ranking
+        expected = {
+            'pagerank': nr.pagerank(G, signed=False),
+            'signed_pagerank': nr.pagerank(G, signed=True),
+            'sym_pagerank': nr.pagerank(G, signed=False, symmetric=True),
+            'sym_signed_pagerank': nr.pagerank(G, signed=True, symmetric=True),
+            'negativerank': nr.negativerank(G, 0.5),
+            'exp_pagerank': nr.exponentialrank(G),
+            'fans_minus_freaks': dict(enumerate(np.asarray(nr.fans_minus_freaks(G)).ravel())),
+        }
+        ranks = nr.rank_nodes(G, list(expected))
+        self.assertEqual(set(ranks), set(expected))
+        for name in expected:
+            for node in G.nodes():
+                self.assertAlmostEqual(ranks[name][node], expected[name][node])
+
+
+if __name__ == '__main__':
+    unittest.main()
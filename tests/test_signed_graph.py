@@ -0,0 +1,56 @@
+"""
+Testing the array-backed SignedGraph.
+"""
+import SignedNetZoo
+import unittest
+import numpy as np
+
+from helpers import random_signed_graph
+
+
+class TestSignedGraph(unittest.TestCase):
+
+    def setUp(self):
+        self.G = random_signed_graph(20, 4, seed=0)
+        self.S = SignedNetZoo.SignedGraph.from_networkx(self.G)
+
+    def test_conversion(self):
+        self.assertEqual(self.S.number_of_nodes(), 20)
+        self.assertEqual(self.S.number_of_edges(), self.G.number_of_edges())
+        self.assertEqual(self.S.indptr.dtype, np.int32)
+        self.assertEqual(self.S.indices.dtype, np.int32)
+        self.assertEqual(self.S.weights.dtype, np.int8)
+        H = self.S.to_networkx()
+        self.assertEqual(sorted(H.edges(data='weight')), sorted(self.G.edges(data='weight')))
+
+    def test_from_edges(self):
+        S = SignedNetZoo.SignedGraph.from_edges([2, 0, 2, 0], [1, 1, 0, 1], [1, -1, -1, 1],
+                                                num_nodes=4)
+        self.assertEqual(S.indptr.tolist(), [0, 1, 1, 3, 3])
+        self.assertEqual(S.indices.tolist(), [1, 0, 1])
+        self.assertEqual(S.weights.tolist(), [1, -1, 1])
+        self.assertTrue(S.has_edge(2, 0))
+        self.assertFalse(S.has_edge(0, 2))
+        self.assertEqual(S.edge_weights([0, 0, 2, 3], [1, 2, 0, 3]).tolist(), [1, 0, -1, 0])
+        self.assertEqual(S.transpose().indices.tolist(), [2, 0, 2])
+
+    def test_graph_properties(self):
+        gp = SignedNetZoo.graph_properties
+        for func in [gp.get_absolute_adjacency_matrix, gp.get_symmetric_adjacency_matrix,
+                     gp.get_absolute_symmetric_diagonal_degree_matrix]:
+            self.assertEqual(abs(func(self.G) - func(self.S)).sum(), 0)
+        for func in [gp.clustering_coeffs.clustering_coeff,
+                     gp.clustering_coeffs.sign_clustering_coeff]:
+            self.assertAlmostEqual(func(self.G), func(self.S))
+        self.assertEqual(gp.is_balanced(self.G)[0], gp.is_balanced(self.S)[0])
+
+    def test_link_prediction(self):
+        baseline = SignedNetZoo.link_prediction.baseline
+        links = [(u, v) for u in range(5) for v in range(5) if u != v]
+        for func in [baseline.uninformative_prediction, baseline.undirected_prediction,
+                     baseline.mult_trans_prediction]:
+            self.assertEqual(func(self.G, links), func(self.S, links))
+
+
+if __name__ == '__main__':
+    unittest.main()